@@ -1,11 +1,28 @@
+import os
+
 from .tablero_sombras import TableroSombras
 from .ia_sombras import IASombras
 from .constantes import TEAM_PLAYER, TEAM_ENEMY
 
+# Procesos para la búsqueda del Boss (1 = en el mismo proceso); en servidores con muchos núcleos,
+# p. ej. AJEDREZ_SOMBRAS_PROCESOS=16
+def _procesos_ia() -> int:
+    """Lee AJEDREZ_SOMBRAS_PROCESOS; un valor vacío o no numérico vale 1, y nunca menos de 1."""
+    valor = os.environ.get("AJEDREZ_SOMBRAS_PROCESOS", "").strip()
+    try:
+        return max(1, int(valor))
+    except ValueError:
+        if valor:
+            print(f"AJEDREZ_SOMBRAS_PROCESOS no es un número ({valor!r}); se usa 1 proceso")
+        return 1
+
+
+PROCESOS_IA = _procesos_ia()
+
 class GameManager:
     def __init__(self):
         self.tablero = TableroSombras()
-        self.ia = IASombras(self.tablero)
+        self.ia = IASombras(self.tablero, procesos=PROCESOS_IA)
         self.turno = TEAM_PLAYER
         self.game_over = False
         self.winner = None
@@ -13,7 +30,7 @@ class GameManager:
 
     def reset_game(self):
         self.tablero = TableroSombras()
-        self.ia = IASombras(self.tablero)
+        self.ia = IASombras(self.tablero, procesos=PROCESOS_IA)
         self.turno = TEAM_PLAYER
         self.game_over = False
         self.winner = None
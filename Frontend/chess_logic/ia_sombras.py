@@ -1,27 +1,379 @@
 """IA del Boss - Enemigo inteligente con sistema de evaluación tipo Árbol de Decisiones (Minimax) y Poda Alfa-Beta."""
 
+import atexit
 import random
-import copy
 import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from .constantes import *
 from .pieza_sombras import PiezaSombraPeon
 
 
-class VirtualBoard:
-    """Clase ligera para simular movimientos sin afectar el tablero real."""
-    def __init__(self, piezas_data):
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.piezas = []
-        for p_data in piezas_data:
-            p_obj = type('VirtualPiece', (), p_data)
-            self.grid[p_data['y']][p_data['x']] = p_obj
-            self.piezas.append(p_obj)
+# Códigos compactos del estado de búsqueda
+TIPOS = ("PEON", "CABALLO", "ALFIL", "TORRE", "REINA", "REY", "BOSS")
+CODIGO_TIPO = {nombre: codigo for codigo, nombre in enumerate(TIPOS)}
+PEON, CABALLO, ALFIL, TORRE, REINA, REY, BOSS = range(len(TIPOS))
+JUGADOR, ENEMIGO = 0, 1
+VACIA = -1
+
+_SALTOS_CABALLO = ((1, 2), (1, -2), (-1, 2), (-1, -2), (2, 1), (2, -1), (-2, 1), (-2, -1))
+_DIRECCIONES_REY = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+_DIRECCIONES_ALFIL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+_DIRECCIONES_TORRE = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def _saltos(desplazamientos):
+    """Destinos por casilla (y*8+x) para piezas de un paso, en el orden de `desplazamientos`."""
+    tabla = []
+    for casilla in range(GRID_WIDTH * GRID_HEIGHT):
+        x, y = casilla % GRID_WIDTH, casilla // GRID_WIDTH
+        tabla.append(tuple(
+            (y + dy) * GRID_WIDTH + x + dx for dx, dy in desplazamientos
+            if 0 <= x + dx < GRID_WIDTH and 0 <= y + dy < GRID_HEIGHT
+        ))
+    return tabla
+
+
+def _rayos(direcciones):
+    """Casillas recorridas por dirección desde cada casilla (Alfil, Torre, Reina)."""
+    tabla = []
+    for casilla in range(GRID_WIDTH * GRID_HEIGHT):
+        x, y = casilla % GRID_WIDTH, casilla // GRID_WIDTH
+        rayos = []
+        for dx, dy in direcciones:
+            rayo = []
+            nx, ny = x + dx, y + dy
+            while 0 <= nx < GRID_WIDTH and 0 <= ny < GRID_HEIGHT:
+                rayo.append(ny * GRID_WIDTH + nx)
+                nx, ny = nx + dx, ny + dy
+            rayos.append(tuple(rayo))
+        tabla.append(tuple(rayos))
+    return tabla
+
+
+SALTOS_CABALLO = _saltos(_SALTOS_CABALLO)
+SALTOS_REY = _saltos(_DIRECCIONES_REY)
+RAYOS = {
+    ALFIL: _rayos(_DIRECCIONES_ALFIL),
+    TORRE: _rayos(_DIRECCIONES_TORRE),
+    REINA: _rayos(_DIRECCIONES_REY),
+}
+FILA_PROMOCION = {JUGADOR: 0, ENEMIGO: GRID_HEIGHT - 1}
+
+# Claves Zobrist de 64 bits con semilla fija (la misma posición da la misma clave en cada turno)
+_generador_zobrist = random.Random(0x5E0B2A5)
+NUM_CASILLAS = GRID_WIDTH * GRID_HEIGHT
+# Todos los HP y daños son múltiplos de 5: el tramo hp // 5 distingue cualquier HP real
+TRAMO_HP = 5
+NUM_TRAMOS_HP = STATS["BOSS"]["hp"] // TRAMO_HP + 1
+# Z_PIEZA[equipo * len(TIPOS) + tipo][casilla]
+Z_PIEZA = [[_generador_zobrist.getrandbits(64) for _ in range(NUM_CASILLAS)] for _ in range(2 * len(TIPOS))]
+# Z_HP[tramo][casilla]: HP de la pieza que ocupa la casilla
+Z_HP = [[_generador_zobrist.getrandbits(64) for _ in range(NUM_CASILLAS)] for _ in range(NUM_TRAMOS_HP)]
+# Peón que aún puede avanzar dos casillas
+Z_PRIMER_MOVIMIENTO = [_generador_zobrist.getrandbits(64) for _ in range(NUM_CASILLAS)]
+# Se aplica cuando mueve el jugador
+Z_TURNO_JUGADOR = _generador_zobrist.getrandbits(64)
+
+# Cotas guardadas en la tabla de transposición
+EXACTA, INFERIOR, SUPERIOR = 0, 1, 2
+# Entradas máximas de la tabla de transposición antes de vaciarla
+MAX_TT = 1 << 18
+
+# Presupuesto por jugada del Boss y tope de la profundización iterativa
+TIEMPO_MS_DEFECTO = 300
+PROFUNDIDAD_MAXIMA = 10
+# Con semilla la profundización se detiene aquí (el presupuesto de tiempo sigue valiendo)
+PROFUNDIDAD_CON_SEMILLA = 4
+
+
+class _TiempoAgotado(Exception):
+    """Interrumpe la iteración en curso cuando se agota el presupuesto de tiempo."""
+
+
+# Procesos para la búsqueda en paralelo; se crean con la primera búsqueda que los pide
+_POOL_PROCESOS = None
+_NUM_PROCESOS = 0
+
+
+def _pool_procesos(procesos):
+    """ProcessPoolExecutor compartido con `procesos` trabajadores (se recrea si cambia el número)."""
+    global _POOL_PROCESOS, _NUM_PROCESOS
+    if _POOL_PROCESOS is None or _NUM_PROCESOS != procesos:
+        if _POOL_PROCESOS is not None:
+            _POOL_PROCESOS.shutdown(wait=False, cancel_futures=True)
+        _POOL_PROCESOS = ProcessPoolExecutor(max_workers=procesos)
+        _NUM_PROCESOS = procesos
+    return _POOL_PROCESOS
+
+
+def _cerrar_pool_procesos():
+    if _POOL_PROCESOS is not None:
+        _POOL_PROCESOS.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_cerrar_pool_procesos)
+
+# IA de cada proceso trabajador; conserva su tabla de transposición entre tareas si no hay semilla
+_IA_PROCESO = None
+
+
+def _buscar_en_proceso(estado, jugadas, profundidad, pesos, segundos, reproducible):
+    """Busca en un proceso trabajador un grupo de jugadas raíz de `estado` a `profundidad`.
+
+    Con `reproducible` (IA con semilla) se parte de una tabla vacía y se aplica
+    la misma política de tabla que el proceso principal (`_tt_misma_profundidad`).
+    Devuelve ((puntaje, índice en `jugadas`) o None si se agotó el tiempo, nodos).
+    """
+    global _IA_PROCESO
+    if _IA_PROCESO is None or reproducible or _IA_PROCESO.pesos != pesos:
+        _IA_PROCESO = IASombras(None)
+        _IA_PROCESO.pesos = pesos
+        _IA_PROCESO._tt_misma_profundidad = reproducible
+    ia = _IA_PROCESO
+    ia.nodos = 0
+    ia._limite = time.perf_counter() + segundos
+    ia.ordenacion.nueva_busqueda()
+    mejor, mejor_puntaje = None, -float('inf')
+    try:
+        for k, (i, destino) in enumerate(jugadas):
+            estado.hacer(i, destino)
+            puntaje = ia._minimax(estado, profundidad - 1, mejor_puntaje, float('inf'), False)
+            estado.deshacer()
+            if puntaje > mejor_puntaje or mejor is None:
+                mejor_puntaje, mejor = puntaje, k
+    except _TiempoAgotado:
+        return None, ia.nodos
+    return (mejor_puntaje, mejor), ia.nodos
+
+
+class EstadoSombras:
+    """Estado de búsqueda compacto: buzón de 64 casillas y arrays paralelos por pieza.
+
+    `tablero[casilla]` es el índice de la pieza (o VACIA); `casilla[i]`, `tipo[i]`,
+    `equipo[i]`, `hp[i]`... describen la pieza i (casilla -1 si murió). Las jugadas
+    son pares (i, destino) y se aplican con `hacer`/`deshacer` sobre el mismo
+    estado, sin copiar piezas ni crear objetos por nodo. `hash` es la clave
+    Zobrist (piezas, tramos de HP, primer movimiento y turno), actualizada en
+    cada jugada.
+    """
+    def __init__(self, piezas, turno=ENEMIGO):
+        n = len(piezas)
+        self.tablero = [VACIA] * (GRID_WIDTH * GRID_HEIGHT)
+        self.casilla = [VACIA] * n
+        self.tipo = [0] * n
+        self.equipo = [0] * n
+        self.hp = [0] * n
+        self.hp_max = [0] * n
+        self.damage = [0] * n
+        self.es_boss = [False] * n
+        self.primer_movimiento = [False] * n
+        self.pila = []
+        for i, p in enumerate(piezas):
+            casilla = p.grid_y * GRID_WIDTH + p.grid_x
+            self.tablero[casilla] = i
+            self.casilla[i] = casilla
+            self.tipo[i] = CODIGO_TIPO.get(p.tipo, PEON)
+            self.equipo[i] = JUGADOR if p.team == TEAM_PLAYER else ENEMIGO
+            self.hp[i] = p.hp
+            self.hp_max[i] = p.hp_max
+            self.damage[i] = p.damage
+            self.es_boss[i] = p.es_boss
+            self.primer_movimiento[i] = getattr(p, "primer_movimiento", False)
+        self.bosses = [i for i in range(n) if self.es_boss[i]]
+        self.reyes = [i for i in range(n) if self.equipo[i] == JUGADOR and self.tipo[i] == REY]
+        self.turno = turno
+        self.hash = Z_TURNO_JUGADOR if turno == JUGADOR else 0
+        for i in range(n):
+            self.hash ^= self._clave_pieza(i)
+
+    def _clave_pieza(self, i):
+        """Parte de la clave Zobrist que aporta la pieza i en su casilla."""
+        casilla = self.casilla[i]
+        clave = (Z_PIEZA[self.equipo[i] * len(TIPOS) + self.tipo[i]][casilla]
+                 ^ Z_HP[min(max(self.hp[i], 0) // TRAMO_HP, NUM_TRAMOS_HP - 1)][casilla])
+        if self.primer_movimiento[i] and self.tipo[i] == PEON:
+            clave ^= Z_PRIMER_MOVIMIENTO[casilla]
+        return clave
+
+    def movimientos(self, equipo):
+        """Jugadas (i, destino) del equipo, con las mismas reglas que `obtener_movimientos_validos`."""
+        tablero, casillas, equipos = self.tablero, self.casilla, self.equipo
+        jugadas = []
+        for i, origen in enumerate(casillas):
+            if origen < 0 or equipos[i] != equipo:
+                continue
+            tipo = self.tipo[i]
+            if tipo == PEON:
+                x, y = origen % GRID_WIDTH, origen // GRID_WIDTH
+                direccion = -1 if equipo == JUGADOR else 1
+                ny = y + direccion
+                if 0 <= ny < GRID_HEIGHT:
+                    destino = origen + direccion * GRID_WIDTH
+                    if tablero[destino] == VACIA:
+                        jugadas.append((i, destino))
+                        ny2 = ny + direccion
+                        if self.primer_movimiento[i] and 0 <= ny2 < GRID_HEIGHT:
+                            destino2 = destino + direccion * GRID_WIDTH
+                            if tablero[destino2] == VACIA:
+                                jugadas.append((i, destino2))
+                    for dx in (-1, 1):
+                        if 0 <= x + dx < GRID_WIDTH:
+                            objetivo = tablero[destino + dx]
+                            if objetivo != VACIA and equipos[objetivo] != equipo:
+                                jugadas.append((i, destino + dx))
+            elif tipo == CABALLO or tipo == REY or tipo == BOSS:
+                for destino in (SALTOS_CABALLO if tipo == CABALLO else SALTOS_REY)[origen]:
+                    objetivo = tablero[destino]
+                    if objetivo == VACIA or equipos[objetivo] != equipo:
+                        jugadas.append((i, destino))
+            else:
+                for rayo in RAYOS[tipo][origen]:
+                    for destino in rayo:
+                        objetivo = tablero[destino]
+                        if objetivo == VACIA:
+                            jugadas.append((i, destino))
+                            continue
+                        if equipos[objetivo] != equipo:
+                            jugadas.append((i, destino))
+                        break
+        return jugadas
+
+    def hacer(self, i, destino):
+        """Aplica la jugada como `TableroSombras.mover_pieza`: ataque, captura al morir y promoción."""
+        origen = self.casilla[i]
+        objetivo = self.tablero[destino]
+        self.pila.append((i, origen, destino, objetivo, self.hp[objetivo] if objetivo != VACIA else 0,
+                          self.tipo[i], self.hp[i], self.hp_max[i], self.damage[i], self.primer_movimiento[i],
+                          self.hash))
+        self.turno ^= 1
+        self.hash ^= Z_TURNO_JUGADOR
+        if objetivo != VACIA:
+            self.hash ^= self._clave_pieza(objetivo)
+            self.hp[objetivo] -= self.damage[i]
+            if self.hp[objetivo] > 0:
+                # Golpe sin muerte: el atacante no se mueve
+                self.hash ^= self._clave_pieza(objetivo)
+                return
+            self.casilla[objetivo] = VACIA
+        self.hash ^= self._clave_pieza(i)
+        self.tablero[origen] = VACIA
+        self.tablero[destino] = i
+        self.casilla[i] = destino
+        self.primer_movimiento[i] = False
+        if self.tipo[i] == PEON and destino // GRID_WIDTH == FILA_PROMOCION[self.equipo[i]]:
+            stats_reina = STATS["REINA"]
+            self.tipo[i] = REINA
+            self.hp[i] = self.hp_max[i] = stats_reina["hp"]
+            self.damage[i] = stats_reina["dmg"]
+        self.hash ^= self._clave_pieza(i)
+
+    def deshacer(self):
+        """Revierte la última jugada de `hacer`."""
+        i, origen, destino, objetivo, hp_objetivo, tipo, hp, hp_max, damage, primer, self.hash = self.pila.pop()
+        self.turno ^= 1
+        if self.casilla[i] != origen:
+            self.tablero[destino] = VACIA
+            self.tablero[origen] = i
+            self.casilla[i] = origen
+        if objetivo != VACIA:
+            self.hp[objetivo] = hp_objetivo
+            self.casilla[objetivo] = destino
+            self.tablero[destino] = objetivo
+        self.tipo[i], self.hp[i], self.hp_max[i], self.damage[i] = tipo, hp, hp_max, damage
+        self.primer_movimiento[i] = primer
+
+    def terminado(self):
+        """True si murió el Boss o el Rey del jugador."""
+        casillas = self.casilla
+        return (not any(casillas[i] >= 0 for i in self.bosses)
+                or not any(casillas[i] >= 0 for i in self.reyes))
+
+
+class OrdenacionGeneracion:
+    """Paso de ordenación mínimo: orden de generación con la jugada de la tabla primero.
+
+    Es la interfaz de la ordenación de jugadas de `IASombras`; sirve de
+    referencia para medir otras ordenaciones con los mismos nodos.
+    """
+    def nueva_busqueda(self):
+        """Se llama al empezar cada `calcular_movimiento`."""
+
+    def ordenar(self, estado, jugadas, ply, jugada_tt):
+        """Ordena en el sitio las jugadas (i, destino) del bando al que le toca en `estado`."""
+        if jugada_tt is not None:
+            origen, destino = jugada_tt
+            for k, (i, d) in enumerate(jugadas):
+                if d == destino and estado.casilla[i] == origen:
+                    if k:
+                        jugadas.insert(0, jugadas.pop(k))
+                    break
+        return jugadas
+
+    def registrar_corte(self, estado, origen, destino, ply, profundidad):
+        """Avisa de que la jugada origen->destino produjo un corte beta en `estado`."""
 
-    def obtener_pieza_en(self, x, y):
-        if 0 <= x < GRID_WIDTH and 0 <= y < GRID_HEIGHT:
-            return self.grid[y][x]
-        return None
+
+class OrdenacionJugadas(OrdenacionGeneracion):
+    """Jugada de la tabla, ataques letales, ataques con daño, killers por ply e historia.
+
+    - Ataque letal (daño >= HP del objetivo): primero el objetivo más valioso
+      y, a igualdad, el atacante menos valioso
+    - Ataque sin muerte: valor del objetivo por fracción de HP que le quita
+    - Jugadas tranquilas: las dos killers del ply y después la tabla de historia
+      (profundidad² por cada corte, a la mitad en cada búsqueda nueva)
+    """
+    MAX_PLY = 64
+
+    def __init__(self):
+        self.valores = tuple(IASombras.VALORES_PIEZAS[nombre] for nombre in TIPOS)
+        self.killers = [[None, None] for _ in range(self.MAX_PLY)]
+        # historia[equipo][origen * 64 + destino]
+        self.historia = [[0] * (NUM_CASILLAS * NUM_CASILLAS) for _ in range(2)]
+
+    def nueva_busqueda(self):
+        self.killers = [[None, None] for _ in range(self.MAX_PLY)]
+        for tabla in self.historia:
+            tabla[:] = [valor >> 1 for valor in tabla]
+
+    def ordenar(self, estado, jugadas, ply, jugada_tt):
+        tablero, casillas, tipos, hp, damage = estado.tablero, estado.casilla, estado.tipo, estado.hp, estado.damage
+        valores = self.valores
+        killer_1, killer_2 = self.killers[ply] if ply < self.MAX_PLY else (None, None)
+        historia = self.historia[estado.turno]
+
+        def puntuar(jugada):
+            i, destino = jugada
+            origen = casillas[i]
+            if jugada_tt is not None and jugada_tt[0] == origen and jugada_tt[1] == destino:
+                return 1 << 40
+            objetivo = tablero[destino]
+            if objetivo != VACIA:
+                valor = valores[tipos[objetivo]]
+                if damage[i] >= hp[objetivo]:
+                    return (3 << 32) + valor * 4096 - valores[tipos[i]]
+                return (2 << 32) + valor * 1024 * damage[i] // hp[objetivo]
+            if killer_1 is not None and killer_1[0] == origen and killer_1[1] == destino:
+                return (1 << 32) + 1
+            if killer_2 is not None and killer_2[0] == origen and killer_2[1] == destino:
+                return 1 << 32
+            return historia[origen * NUM_CASILLAS + destino]
+
+        # sort es estable: a igualdad se conserva el orden de generación (o el barajado de la raíz)
+        jugadas.sort(key=puntuar, reverse=True)
+        return jugadas
+
+    def registrar_corte(self, estado, origen, destino, ply, profundidad):
+        # Los ataques ya van delante; killers e historia son para jugadas tranquilas
+        if estado.tablero[destino] != VACIA:
+            return
+        if ply < self.MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != (origen, destino):
+                killers[1] = killers[0]
+                killers[0] = (origen, destino)
+        self.historia[estado.turno][origen * NUM_CASILLAS + destino] += profundidad * profundidad
 
 
 class IASombras:
@@ -44,9 +396,29 @@ class IASombras:
         "W_AGGRESSION": 1.0     # Tendencia a atacar piezas enemigas
     }
     
-    def __init__(self, tablero):
+    def __init__(self, tablero, tiempo_ms=TIEMPO_MS_DEFECTO, ordenacion=None, procesos=1, semilla=None,
+                 profundidad_semilla=PROFUNDIDAD_CON_SEMILLA):
         self.tablero = tablero
-        self.cache_evaluaciones = {}
+        self.tiempo_ms = tiempo_ms
+        # Con procesos > 1 las jugadas raíz se reparten en un ProcessPoolExecutor
+        self.procesos = max(1, procesos or 1)
+        # Con semilla, el barajado y las invocaciones son reproducibles y la búsqueda
+        # se detiene en `profundidad_semilla`; ver `calcular_movimiento`
+        self.semilla = semilla
+        self.aleatorio = random.Random(semilla) if semilla is not None else random.Random()
+        self.profundidad_semilla = profundidad_semilla
+        # Con semilla la tabla solo corta con entradas de la misma profundidad: los
+        # valores no dependen de qué subárbol (o proceso) guardó antes la posición
+        self._tt_misma_profundidad = semilla is not None
+        # Paso de ordenación de jugadas (intercambiable para medir, p. ej. OrdenacionGeneracion)
+        self.ordenacion = ordenacion if ordenacion is not None else OrdenacionJugadas()
+        # Estadísticas de la última búsqueda
+        self.nodos = 0
+        self.ultima_profundidad = 0
+        self._limite = float('inf')
+        # Tabla de transposición: hash -> (profundidad, valor, cota, (origen, destino));
+        # se conserva entre turnos, las posiciones de la partida se repiten en la búsqueda
+        self.tabla_transposicion = {}
         self.ruta_pesos = os.path.join(os.path.dirname(__file__), "ia_weights.json")
         self.pesos = self._cargar_pesos()
     
@@ -81,13 +453,34 @@ class IASombras:
             self.pesos["W_AGGRESSION"] = max(0.5, self.pesos["W_AGGRESSION"] - 0.1)
             
         self._guardar_pesos()
+        # Las evaluaciones guardadas se hicieron con los pesos anteriores
+        self.tabla_transposicion.clear()
         print(f"Nuevos pesos de IA: {self.pesos}")
     
-    def calcular_movimiento(self):
-        self.cache_evaluaciones.clear()
+    def calcular_movimiento(self, tiempo_ms=None, profundidad_maxima=None):
+        """Mejor jugada del Boss por profundización iterativa dentro de `tiempo_ms` (por defecto `self.tiempo_ms`).
+
+        Cada iteración empieza por la mejor jugada de la anterior (guardada en la
+        tabla de transposición). Si el tiempo se agota a mitad de una iteración,
+        se devuelve la mejor jugada de la última completa. `profundidad_maxima`
+        limita las iteraciones (útil para comparar ordenaciones por nodos).
+
+        Con `semilla`, `profundidad_maxima` es por defecto `profundidad_semilla`,
+        la tabla de transposición se vacía en cada llamada, la raíz se recorre en
+        el orden barajado y la tabla solo corta con entradas de la misma
+        profundidad (igual que en los procesos trabajadores). Así la jugada no
+        depende de los turnos anteriores ni del número de procesos mientras la
+        búsqueda complete esa profundidad dentro de `tiempo_ms`; si el tiempo se
+        agota antes, manda el reloj y se devuelve la última iteración completa.
+        """
+        if profundidad_maxima is None:
+            profundidad_maxima = PROFUNDIDAD_MAXIMA if self.semilla is None else self.profundidad_semilla
+        if self.semilla is not None or len(self.tabla_transposicion) > MAX_TT:
+            self.tabla_transposicion.clear()
         
-        estado_inicial = self._obtener_representacion_estado()
-        posibles_movimientos = self._obtener_todos_los_movimientos(estado_inicial, TEAM_ENEMY)
+        piezas = list(self.tablero.piezas)
+        estado = EstadoSombras(piezas, ENEMIGO)
+        posibles_movimientos = estado.movimientos(ENEMIGO)
         
         if not posibles_movimientos:
             return None
@@ -98,23 +491,67 @@ class IASombras:
         predicciones = self.obtener_predicciones_estimadas(posibles_movimientos)
         print(f"Capacidad de Predicción de IA: {predicciones}")
         
-        mejor_movimiento = None
-        mejor_puntaje = -float('inf')
+        self.aleatorio.shuffle(posibles_movimientos)
+        self.ordenacion.nueva_busqueda()
+        limite = time.perf_counter() + (self.tiempo_ms if tiempo_ms is None else tiempo_ms) / 1000
+        self.nodos = 0
+        self.ultima_profundidad = 0
+        mejor_jugada = None
         
-        random.shuffle(posibles_movimientos) 
-        depth = 3
+        for profundidad in range(1, profundidad_maxima + 1):
+            # La primera iteración siempre termina: hay jugada aunque el presupuesto sea mínimo
+            self._limite = limite if profundidad > 1 else float('inf')
+            try:
+                if self.procesos > 1 and profundidad > 1:
+                    jugada = self._buscar_raiz_paralela(estado, posibles_movimientos, profundidad, limite)
+                else:
+                    jugada = self._buscar_raiz(estado, posibles_movimientos, profundidad)
+            except _TiempoAgotado:
+                while estado.pila:
+                    estado.deshacer()
+                break
+            if jugada is None:
+                break
+            mejor_jugada = jugada
+            self.ultima_profundidad = profundidad
+            if time.perf_counter() >= limite:
+                break
+
+        if mejor_jugada is None:
+            return None
+        i, destino = mejor_jugada
+        # El índice de la jugada es el de la pieza real en `piezas`
+        return (piezas[i], destino % GRID_WIDTH, destino // GRID_WIDTH)
+
+    def _buscar_raiz(self, estado, movimientos, profundidad):
+        """Una iteración completa a `profundidad`; devuelve la mejor jugada (i, destino) o None."""
+        mejor_jugada = None
+        mejor_puntaje = -float('inf')
         
-        for p_idx_in_estado, nx, ny in posibles_movimientos:
-            nuevo_estado = self._simular_movimiento(estado_inicial, p_idx_in_estado, nx, ny)
-            puntaje = self._minimax(nuevo_estado, depth - 1, -float('inf'), float('inf'), False)
+        for i, destino in self._ordenar_raiz(estado, movimientos):
+            origen = estado.casilla[i]
+            estado.hacer(i, destino)
+            # Ventana (mejor, inf): las jugadas que no mejoran se descartan con cotas
+            puntaje = self._minimax(estado, profundidad - 1, mejor_puntaje, float('inf'), False)
+            estado.deshacer()
             
             if puntaje > mejor_puntaje:
                 mejor_puntaje = puntaje
-                # Recuperar la pieza real usando el objeto guardado en p_data
-                p_data = estado_inicial['piezas'][p_idx_in_estado]
-                mejor_movimiento = (p_data['original_obj'], nx, ny)
+                mejor_jugada = (i, origen, destino)
+
+        if mejor_jugada is None:
+            return None
+        i, origen, destino = mejor_jugada
+        self.tabla_transposicion[estado.hash] = (profundidad, mejor_puntaje, EXACTA, (origen, destino))
+        return (i, destino)
 
-        return mejor_movimiento
+    def _ordenar_raiz(self, estado, movimientos):
+        """Orden de las jugadas raíz; con semilla, el barajado (los desempates no dependen de la historia)."""
+        if self.semilla is not None:
+            return list(movimientos)
+        entrada = self.tabla_transposicion.get(estado.hash)
+        jugada_tt = entrada[3] if entrada is not None else None
+        return self.ordenacion.ordenar(estado, movimientos, 0, jugada_tt)
 
     def obtener_predicciones_estimadas(self, posibles_movimientos):
         """Calcula la complejidad de predicción de forma dinámica."""
@@ -124,39 +561,106 @@ class IASombras:
         valor = total_movs * 130 / 10
         return max(1, min(1000, int(valor)))
 
+    def _buscar_raiz_paralela(self, estado, movimientos, profundidad, limite):
+        """Como `_buscar_raiz`, repartiendo las jugadas raíz entre `self.procesos` procesos.
+
+        Cada proceso recibe una copia del estado y un grupo fijo de jugadas
+        (reparto por turnos sobre el orden de la raíz) y devuelve su mejor
+        puntaje exacto. El ganador se elige por puntaje y, a igualdad, por
+        posición en la raíz, así que no depende de qué proceso acaba antes.
+        """
+        jugadas = self._ordenar_raiz(estado, movimientos)
+        grupos = min(self.procesos, len(jugadas))
+        segundos = max(0.0, limite - time.perf_counter())
+        pool = _pool_procesos(self.procesos)
+        futuros = [
+            pool.submit(_buscar_en_proceso, estado, jugadas[g::grupos], profundidad, self.pesos, segundos,
+                        self.semilla is not None)
+            for g in range(grupos)
+        ]
+        mejor = None
+        for g, futuro in enumerate(futuros):
+            resultado, nodos = futuro.result()
+            self.nodos += nodos
+            if resultado is None:
+                for pendiente in futuros:
+                    pendiente.cancel()
+                raise _TiempoAgotado()
+            puntaje, k = resultado
+            indice = g + k * grupos
+            if mejor is None or puntaje > mejor[0] or (puntaje == mejor[0] and indice < mejor[1]):
+                mejor = (puntaje, indice)
+
+        puntaje, indice = mejor
+        i, destino = jugadas[indice]
+        self.tabla_transposicion[estado.hash] = (profundidad, puntaje, EXACTA, (estado.casilla[i], destino))
+        return (i, destino)
+
     def _minimax(self, estado, profundidad, alfa, beta, es_maximizando):
-        # Crear un hash estable sin incluir las referencias a objetos
-        state_hash = tuple(sorted((p['x'], p['y'], p['team'], p['tipo'], p['hp']) for p in estado['piezas']))
-        if state_hash in self.cache_evaluaciones:
-            return self.cache_evaluaciones[state_hash]
+        self.nodos += 1
+        if not self.nodos & 255 and time.perf_counter() >= self._limite:
+            raise _TiempoAgotado()
+        entrada = self.tabla_transposicion.get(estado.hash)
+        jugada_tt = None
+        if entrada is not None:
+            prof_tt, valor_tt, cota, jugada_tt = entrada
+            if prof_tt == profundidad or (prof_tt > profundidad and not self._tt_misma_profundidad):
+                if cota == EXACTA:
+                    return valor_tt
+                if cota == INFERIOR and valor_tt >= beta:
+                    return valor_tt
+                if cota == SUPERIOR and valor_tt <= alfa:
+                    return valor_tt
 
-        if profundidad == 0 or self._esta_terminado(estado):
+        if profundidad == 0 or estado.terminado():
             ev = self._evaluar_estado(estado)
-            self.cache_evaluaciones[state_hash] = ev
+            self.tabla_transposicion[estado.hash] = (profundidad, ev, EXACTA, None)
             return ev
 
+        alfa_original, beta_original = alfa, beta
+        mejor = None
+        ply = len(estado.pila)
+        movimientos = self.ordenacion.ordenar(
+            estado, estado.movimientos(ENEMIGO if es_maximizando else JUGADOR), ply, jugada_tt
+        )
         if es_maximizando:
             max_eval = -float('inf')
-            movimientos = self._obtener_todos_los_movimientos(estado, TEAM_ENEMY)
-            for p_idx, nx, ny in movimientos:
-                nuevo_estado = self._simular_movimiento(estado, p_idx, nx, ny)
-                ev = self._minimax(nuevo_estado, profundidad - 1, alfa, beta, False)
-                max_eval = max(max_eval, ev)
+            for i, destino in movimientos:
+                origen = estado.casilla[i]
+                estado.hacer(i, destino)
+                ev = self._minimax(estado, profundidad - 1, alfa, beta, False)
+                estado.deshacer()
+                if ev > max_eval:
+                    max_eval, mejor = ev, (origen, destino)
                 alfa = max(alfa, ev)
                 if beta <= alfa:
+                    self.ordenacion.registrar_corte(estado, origen, destino, ply, profundidad)
                     break
-            return max_eval
+            valor = max_eval
         else:
             min_eval = float('inf')
-            movimientos = self._obtener_todos_los_movimientos(estado, TEAM_PLAYER)
-            for p_idx, nx, ny in movimientos:
-                nuevo_estado = self._simular_movimiento(estado, p_idx, nx, ny)
-                ev = self._minimax(nuevo_estado, profundidad - 1, alfa, beta, True)
-                min_eval = min(min_eval, ev)
+            for i, destino in movimientos:
+                origen = estado.casilla[i]
+                estado.hacer(i, destino)
+                ev = self._minimax(estado, profundidad - 1, alfa, beta, True)
+                estado.deshacer()
+                if ev < min_eval:
+                    min_eval, mejor = ev, (origen, destino)
                 beta = min(beta, ev)
                 if beta <= alfa:
+                    self.ordenacion.registrar_corte(estado, origen, destino, ply, profundidad)
                     break
-            return min_eval
+            valor = min_eval
+
+        # Los valores son siempre desde el Boss: la cota depende de la ventana original
+        if valor <= alfa_original:
+            cota = SUPERIOR
+        elif valor >= beta_original:
+            cota = INFERIOR
+        else:
+            cota = EXACTA
+        self.tabla_transposicion[estado.hash] = (profundidad, valor, cota, mejor)
+        return valor
 
     def _evaluar_estado(self, estado):
         puntaje = 0
@@ -165,17 +669,19 @@ class IASombras:
         w_center = self.pesos.get("W_CENTER", 0.5)
         w_agg = self.pesos.get("W_AGGRESSION", 1.0)
 
-        for p in estado['piezas']:
-            valor_base = self.VALORES_PIEZAS.get(p['tipo'], 10)
-            porcentaje_hp = p['hp'] / p['hp_max']
+        for i, casilla in enumerate(estado.casilla):
+            if casilla < 0:
+                continue
+            valor_base = self.VALORES_PIEZAS[TIPOS[estado.tipo[i]]]
+            porcentaje_hp = estado.hp[i] / estado.hp_max[i]
             valor_actual = valor_base * (0.5 + 0.5 * porcentaje_hp)
             
-            if p['team'] == TEAM_ENEMY:
+            if estado.equipo[i] == ENEMIGO:
                 # Bonificación por material propio
                 puntaje += valor_actual * w_mat
                 
                 # Bonus por seguridad del Boss
-                if p['es_boss']:
+                if estado.es_boss[i]:
                     # Si el Boss tiene poca vida, es un castigo masivo (ajustado por peso)
                     if porcentaje_hp < 0.3:
                         puntaje -= 1000 * w_boss
@@ -183,7 +689,7 @@ class IASombras:
                         puntaje += 500 * porcentaje_hp * w_boss
                     
                 # Control del centro
-                dist_centro = abs(3.5 - p['x']) + abs(3.5 - p['y'])
+                dist_centro = abs(3.5 - casilla % GRID_WIDTH) + abs(3.5 - casilla // GRID_WIDTH)
                 puntaje += (8 - dist_centro) * w_center
             else:
                 # Castigo por material del jugador (agresividad)
@@ -192,89 +698,8 @@ class IASombras:
                 
         return puntaje
 
-    def _obtener_representacion_estado(self):
-        rep = {'piezas': []}
-        for p in self.tablero.piezas:
-            rep['piezas'].append({
-                'x': p.grid_x,
-                'y': p.grid_y,
-                'team': p.team,
-                'tipo': p.tipo,
-                'hp': p.hp,
-                'hp_max': p.hp_max,
-                'damage': p.damage,
-                'es_boss': p.es_boss,
-                'original_obj': p # Guardar referencia al objeto real
-            })
-        return rep
-
-    def _obtener_todos_los_movimientos(self, estado, equipo):
-        movimientos = []
-        v_board = VirtualBoard(estado['piezas'])
-        
-        for idx, p_data in enumerate(estado['piezas']):
-            if p_data['team'] == equipo:
-                p_real = p_data['original_obj']
-                
-                old_x, old_y = p_real.grid_x, p_real.grid_y
-                p_real.grid_x, p_real.grid_y = p_data['x'], p_data['y']
-                
-                validos = p_real.obtener_movimientos_validos(v_board)
-                
-                p_real.grid_x, p_real.grid_y = old_x, old_y
-                
-                for nx, ny in validos:
-                    movimientos.append((idx, nx, ny))
-        return movimientos
-
-    def _simular_movimiento(self, estado, p_idx, nx, ny):
-        # Usar copy.copy y manejar la lista de piezas manualmente para evitar deepcopy de objetos pieza
-        nuevo_estado = {
-            'piezas': [p.copy() for p in estado['piezas']]
-        }
-        pieza = nuevo_estado['piezas'][p_idx]
-        
-        o_idx = -1
-        for i, p in enumerate(nuevo_estado['piezas']):
-            if p['x'] == nx and p['y'] == ny and i != p_idx:
-                o_idx = i
-                break
-        
-        if o_idx != -1:
-            objetivo = nuevo_estado['piezas'][o_idx]
-            if objetivo['team'] != pieza['team']:
-                objetivo['hp'] -= pieza['damage']
-                if objetivo['hp'] <= 0:
-                    nuevo_estado['piezas'].pop(o_idx)
-                    # Si la pieza que se movió estaba después en la lista, su índice cambió
-                    if o_idx < p_idx:
-                        # Buscamos la pieza de nuevo por referencia si fuera necesario, 
-                        # pero aquí simplemente actualizamos la posición de la pieza correcta.
-                        pieza['x'], pieza['y'] = nx, ny
-                    else:
-                        pieza['x'], pieza['y'] = nx, ny
-        else:
-            pieza['x'], pieza['y'] = nx, ny
-            
-        # Simular promoción de peón en la IA
-        if pieza['tipo'] == "PEON":
-            target_rank = 0 if pieza['team'] == TEAM_PLAYER else 7
-            if pieza['y'] == target_rank:
-                pieza['tipo'] = "REINA"
-                stats_reina = STATS["REINA"]
-                pieza['hp'] = stats_reina["hp"]
-                pieza['hp_max'] = stats_reina["hp"]
-                pieza['damage'] = stats_reina["dmg"]
-            
-        return nuevo_estado
-
-    def _esta_terminado(self, estado):
-        has_boss = any(p['es_boss'] for p in estado['piezas'])
-        has_king = any(p['team'] == TEAM_PLAYER and p['tipo'] == "REY" for p in estado['piezas'])
-        return not has_boss or not has_king
-
     def invocar_sombra(self):
-        if random.random() < 0.3:
+        if self.aleatorio.random() < 0.3:
             boss = self._obtener_boss()
             if boss:
                 adyacentes_libres = []
@@ -285,7 +710,7 @@ class IASombras:
                         adyacentes_libres.append((nx, ny))
                 
                 if adyacentes_libres:
-                    x, y = random.choice(adyacentes_libres)
+                    x, y = self.aleatorio.choice(adyacentes_libres)
                     sombra = PiezaSombraPeon(x, y, TEAM_ENEMY, self.tablero.gestor_recursos)
                     self.tablero.agregar_pieza(sombra)
                     print(f"¡El Boss invocó una Sombra en ({x}, {y})!")
@@ -0,0 +1,386 @@
+"""Núcleo bitboard del ajedrez clásico.
+
+Responsabilidades:
+- Representar la posición con doce enteros de 64 bits (uno por color/tipo) y máscaras de ocupación
+- Precalcular tablas de ataque de caballo, rey y peón, y rayos por casilla y dirección
+- Responder consultas de ataque y destinos pseudo-legales con operaciones sobre máscaras
+
+Convención de casillas: índice = y * 8 + x, con (0, 0) = a1, igual que `chess.square`.
+"""
+from typing import Dict, List
+
+BLANCO = 0
+NEGRO = 1
+
+PEON = 0
+CABALLO = 1
+ALFIL = 2
+TORRE = 3
+REINA = 4
+REY = 5
+
+TODAS = (1 << 64) - 1
+
+# Direcciones (dx, dy). Las cuatro primeras avanzan hacia índices mayores,
+# de modo que el primer bloqueo es el bit menos significativo; en las otras
+# cuatro el primer bloqueo es el más significativo.
+DIRECCIONES = [(0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1)]
+DIRECCIONES_TORRE = (0, 1, 4, 5)
+DIRECCIONES_ALFIL = (2, 3, 6, 7)
+ES_RECTA = (True, True, False, False, True, True, False, False)
+
+
+def casilla(x: int, y: int) -> int:
+    """Convierte coordenadas (x, y) al índice 0..63."""
+    return y * 8 + x
+
+
+def coordenadas(sq: int) -> tuple:
+    """Convierte un índice 0..63 a coordenadas (x, y)."""
+    return (sq & 7, sq >> 3)
+
+
+def lsb(b: int) -> int:
+    """Índice del bit menos significativo de una máscara no vacía."""
+    return (b & -b).bit_length() - 1
+
+
+def iterar_bits(b: int):
+    """Recorre los índices de los bits activos de la máscara."""
+    while b:
+        bit = b & -b
+        yield bit.bit_length() - 1
+        b ^= bit
+
+
+def _saltos(desplazamientos) -> List[int]:
+    tabla = []
+    for sq in range(64):
+        x, y = coordenadas(sq)
+        mascara = 0
+        for dx, dy in desplazamientos:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 8 and 0 <= ny < 8:
+                mascara |= 1 << casilla(nx, ny)
+        tabla.append(mascara)
+    return tabla
+
+
+ATAQUES_CABALLO = _saltos([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+ATAQUES_REY = _saltos([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy])
+# ATAQUES_PEON[color][sq]: casillas atacadas por un peón de `color` situado en `sq`
+ATAQUES_PEON = [_saltos([(-1, 1), (1, 1)]), _saltos([(-1, -1), (1, -1)])]
+
+
+def _rayos() -> List[List[int]]:
+    tabla = []
+    for sq in range(64):
+        x, y = coordenadas(sq)
+        por_direccion = []
+        for dx, dy in DIRECCIONES:
+            mascara = 0
+            nx, ny = x + dx, y + dy
+            while 0 <= nx < 8 and 0 <= ny < 8:
+                mascara |= 1 << casilla(nx, ny)
+                nx, ny = nx + dx, ny + dy
+            por_direccion.append(mascara)
+        tabla.append(por_direccion)
+    return tabla
+
+
+RAYOS = _rayos()
+
+
+def _entre() -> List[List[int]]:
+    tabla = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for d in range(8):
+            rayo = RAYOS[a][d]
+            for b in iterar_bits(rayo):
+                tabla[a][b] = rayo ^ RAYOS[b][d] ^ (1 << b)
+    return tabla
+
+
+# ENTRE[a][b]: casillas estrictamente entre a y b si están alineadas, 0 si no
+ENTRE = _entre()
+
+# Derechos de enroque como bits (mismo orden que "KQkq" en FEN)
+ENROQUE_CORTO_BLANCO = 1
+ENROQUE_LARGO_BLANCO = 2
+ENROQUE_CORTO_NEGRO = 4
+ENROQUE_LARGO_NEGRO = 8
+
+
+def _mascara(*casillas_: int) -> int:
+    mascara = 0
+    for sq in casillas_:
+        mascara |= 1 << sq
+    return mascara
+
+
+# (derecho, color, rey origen, rey destino, torre origen, torre destino,
+#  casillas que deben estar vacías, casillas que no pueden estar atacadas)
+ENROQUES = [
+    (ENROQUE_CORTO_BLANCO, BLANCO, 4, 6, 7, 5, _mascara(5, 6), _mascara(5, 6)),
+    (ENROQUE_LARGO_BLANCO, BLANCO, 4, 2, 0, 3, _mascara(1, 2, 3), _mascara(2, 3)),
+    (ENROQUE_CORTO_NEGRO, NEGRO, 60, 62, 63, 61, _mascara(61, 62), _mascara(61, 62)),
+    (ENROQUE_LARGO_NEGRO, NEGRO, 60, 58, 56, 59, _mascara(57, 58, 59), _mascara(58, 59)),
+]
+
+# CONSERVA_ENROQUES[sq]: derechos que sobreviven a un movimiento desde o hacia `sq`
+CONSERVA_ENROQUES = [15] * 64
+CONSERVA_ENROQUES[4] = 15 & ~(ENROQUE_CORTO_BLANCO | ENROQUE_LARGO_BLANCO)
+CONSERVA_ENROQUES[7] = 15 & ~ENROQUE_CORTO_BLANCO
+CONSERVA_ENROQUES[0] = 15 & ~ENROQUE_LARGO_BLANCO
+CONSERVA_ENROQUES[60] = 15 & ~(ENROQUE_CORTO_NEGRO | ENROQUE_LARGO_NEGRO)
+CONSERVA_ENROQUES[63] = 15 & ~ENROQUE_CORTO_NEGRO
+CONSERVA_ENROQUES[56] = 15 & ~ENROQUE_LARGO_NEGRO
+
+
+def ataques_torre(sq: int, ocupadas: int) -> int:
+    """Casillas atacadas por una torre en `sq` dada la ocupación (incluye el primer bloqueo)."""
+    rayos = RAYOS[sq]
+    ataques = 0
+    for d in DIRECCIONES_TORRE:
+        rayo = rayos[d]
+        bloqueo = rayo & ocupadas
+        if bloqueo:
+            primera = (bloqueo & -bloqueo).bit_length() - 1 if d < 4 else bloqueo.bit_length() - 1
+            rayo ^= RAYOS[primera][d]
+        ataques |= rayo
+    return ataques
+
+
+def ataques_alfil(sq: int, ocupadas: int) -> int:
+    """Casillas atacadas por un alfil en `sq` dada la ocupación (incluye el primer bloqueo)."""
+    rayos = RAYOS[sq]
+    ataques = 0
+    for d in DIRECCIONES_ALFIL:
+        rayo = rayos[d]
+        bloqueo = rayo & ocupadas
+        if bloqueo:
+            primera = (bloqueo & -bloqueo).bit_length() - 1 if d < 4 else bloqueo.bit_length() - 1
+            rayo ^= RAYOS[primera][d]
+        ataques |= rayo
+    return ataques
+
+
+class Bitboards:
+    """Posición en bitboards: `piezas[color * 6 + tipo]` más ocupación por color y total."""
+
+    __slots__ = ('piezas', 'ocupacion', 'total')
+
+    def __init__(self):
+        self.piezas = [0] * 12
+        self.ocupacion = [0, 0]
+        self.total = 0
+
+    def poner(self, sq: int, color: int, tipo: int):
+        bit = 1 << sq
+        self.piezas[color * 6 + tipo] |= bit
+        self.ocupacion[color] |= bit
+        self.total |= bit
+
+    def quitar(self, sq: int, color: int, tipo: int):
+        bit = 1 << sq
+        self.piezas[color * 6 + tipo] &= ~bit
+        self.ocupacion[color] &= ~bit
+        self.total &= ~bit
+
+    def mover(self, origen: int, destino: int, color: int, tipo: int):
+        cambio = (1 << origen) | (1 << destino)
+        self.piezas[color * 6 + tipo] ^= cambio
+        self.ocupacion[color] ^= cambio
+        self.total = self.ocupacion[0] | self.ocupacion[1]
+
+    def tipo_en(self, sq: int, color: int) -> int:
+        """Tipo de la pieza de `color` en `sq`, o -1 si no hay ninguna."""
+        bit = 1 << sq
+        if not self.ocupacion[color] & bit:
+            return -1
+        base = color * 6
+        for tipo in range(6):
+            if self.piezas[base + tipo] & bit:
+                return tipo
+        return -1
+
+    def casilla_rey(self, color: int) -> int:
+        """Índice del rey de `color`, o -1 si no está en el tablero."""
+        rey = self.piezas[color * 6 + REY]
+        return lsb(rey) if rey else -1
+
+    def atacantes(self, sq: int, color: int) -> int:
+        """Máscara de las piezas de `color` que atacan la casilla `sq`."""
+        p = self.piezas
+        base = color * 6
+        ocupadas = self.total
+        damas = p[base + REINA]
+        return (
+            (ATAQUES_PEON[color ^ 1][sq] & p[base + PEON])
+            | (ATAQUES_CABALLO[sq] & p[base + CABALLO])
+            | (ATAQUES_REY[sq] & p[base + REY])
+            | (ataques_alfil(sq, ocupadas) & (p[base + ALFIL] | damas))
+            | (ataques_torre(sq, ocupadas) & (p[base + TORRE] | damas))
+        )
+
+    def atacada(self, sq: int, color: int) -> bool:
+        """Indica si `color` ataca `sq` mirando hacia afuera desde la casilla.
+
+        Comprueba primero saltos de caballo, diagonales de peón y rey; después
+        lanza cada rayo deslizante y se detiene en la primera pieza que encuentra.
+        """
+        p = self.piezas
+        base = color * 6
+        if (ATAQUES_PEON[color ^ 1][sq] & p[base + PEON]
+                or ATAQUES_CABALLO[sq] & p[base + CABALLO]
+                or ATAQUES_REY[sq] & p[base + REY]):
+            return True
+        damas = p[base + REINA]
+        rectas = p[base + TORRE] | damas
+        diagonales = p[base + ALFIL] | damas
+        ocupadas = self.total
+        rayos = RAYOS[sq]
+        for d in range(8):
+            deslizantes = rectas if ES_RECTA[d] else diagonales
+            rayo = rayos[d]
+            if not rayo & deslizantes:
+                continue
+            bloqueo = rayo & ocupadas
+            primera = (bloqueo & -bloqueo).bit_length() - 1 if d < 4 else bloqueo.bit_length() - 1
+            if (deslizantes >> primera) & 1:
+                return True
+        return False
+
+    def clavadas(self, rey: int, color: int) -> Dict[int, int]:
+        """Piezas de `color` clavadas contra su rey: casilla -> máscara por la que pueden moverse."""
+        p = self.piezas
+        rival = (color ^ 1) * 6
+        damas = p[rival + REINA]
+        rectas = p[rival + TORRE] | damas
+        diagonales = p[rival + ALFIL] | damas
+        propias = self.ocupacion[color]
+        ocupadas = self.total
+        resultado = {}
+        for d in range(8):
+            deslizantes = rectas if ES_RECTA[d] else diagonales
+            rayo = RAYOS[rey][d]
+            if not rayo & deslizantes:
+                continue
+            bloqueo = rayo & ocupadas
+            primera = (bloqueo & -bloqueo).bit_length() - 1 if d < 4 else bloqueo.bit_length() - 1
+            if not (propias >> primera) & 1:
+                continue
+            bloqueo ^= 1 << primera
+            if not bloqueo:
+                continue
+            segunda = (bloqueo & -bloqueo).bit_length() - 1 if d < 4 else bloqueo.bit_length() - 1
+            if (deslizantes >> segunda) & 1:
+                resultado[primera] = ENTRE[rey][segunda] | (1 << segunda)
+        return resultado
+
+    def movimientos_legales(self, color: int, enroques: int = 0, al_paso: int = -1, objetivos: int = TODAS):
+        """Genera pares (origen, destino) legales para `color` sin probar cada jugada.
+
+        Calcula jaques y clavadas desde la casilla del rey antes de generar:
+        ante jaque doble solo mueve el rey; ante jaque simple el resto de piezas
+        se limita a capturar al atacante o interponerse; las clavadas solo se
+        desplazan sobre su línea de clavada. `enroques` son los derechos vigentes
+        (bits ENROQUE_*) y `al_paso` la casilla de captura al paso o -1. La captura
+        al paso, con su posible descubierta horizontal, se verifica aparte.
+        `objetivos` limita los destinos (p. ej. solo capturas en la búsqueda de
+        quietud); con un límite no se generan enroques.
+        """
+        rey = self.casilla_rey(color)
+        if rey < 0:
+            for sq in iterar_bits(self.ocupacion[color]):
+                for destino in iterar_bits(self.destinos(sq, color, self.tipo_en(sq, color)) & objetivos):
+                    yield sq, destino
+            for sq in self._capturas_al_paso(color, al_paso, -1):
+                yield sq, al_paso
+            return
+
+        rival = color ^ 1
+        bit_rey = 1 << rey
+        self.total ^= bit_rey
+        seguros = [d for d in iterar_bits(self.destinos(rey, color, REY) & objetivos) if not self.atacada(d, rival)]
+        self.total ^= bit_rey
+        for destino in seguros:
+            yield rey, destino
+
+        jaques = self.atacantes(rey, rival)
+        if jaques & (jaques - 1):
+            return
+        if jaques:
+            atacante = lsb(jaques)
+            permitidas = (jaques | ENTRE[rey][atacante]) & objetivos
+        else:
+            permitidas = objetivos
+            if enroques and objetivos == TODAS:
+                for destino in self._enroques(color, enroques):
+                    yield rey, destino
+
+        clavadas = self.clavadas(rey, color)
+        for sq in iterar_bits(self.ocupacion[color] ^ bit_rey):
+            destinos = self.destinos(sq, color, self.tipo_en(sq, color)) & permitidas
+            if sq in clavadas:
+                destinos &= clavadas[sq]
+            for destino in iterar_bits(destinos):
+                yield sq, destino
+
+        for sq in self._capturas_al_paso(color, al_paso, rey):
+            yield sq, al_paso
+
+    def _enroques(self, color: int, enroques: int) -> List[int]:
+        """Destinos del rey para los enroques disponibles (el rey no está en jaque)."""
+        destinos = []
+        for derecho, lado, rey, rey_destino, torre, _, vacias, seguras in ENROQUES:
+            if lado != color or not enroques & derecho:
+                continue
+            if not (self.piezas[color * 6 + REY] >> rey) & 1 or not (self.piezas[color * 6 + TORRE] >> torre) & 1:
+                continue
+            if self.total & vacias:
+                continue
+            if any(self.atacada(sq, color ^ 1) for sq in iterar_bits(seguras)):
+                continue
+            destinos.append(rey_destino)
+        return destinos
+
+    def _capturas_al_paso(self, color: int, al_paso: int, rey: int) -> List[int]:
+        """Peones de `color` que pueden capturar al paso en `al_paso` sin dejar al rey atacado."""
+        if al_paso < 0:
+            return []
+        capturado = al_paso - 8 if color == BLANCO else al_paso + 8
+        origenes = []
+        for sq in iterar_bits(ATAQUES_PEON[color ^ 1][al_paso] & self.piezas[color * 6 + PEON]):
+            self.quitar(capturado, color ^ 1, PEON)
+            self.mover(sq, al_paso, color, PEON)
+            if rey < 0 or not self.atacada(rey, color ^ 1):
+                origenes.append(sq)
+            self.mover(al_paso, sq, color, PEON)
+            self.poner(capturado, color ^ 1, PEON)
+        return origenes
+
+    def destinos(self, sq: int, color: int, tipo: int) -> int:
+        """Destinos pseudo-legales (sin considerar jaque) de la pieza en `sq`."""
+        propias = self.ocupacion[color]
+        if tipo == PEON:
+            vacias = ~self.total & TODAS
+            rivales = self.ocupacion[color ^ 1]
+            if color == BLANCO:
+                uno = (1 << (sq + 8)) & vacias if sq < 56 else 0
+                dos = (1 << (sq + 16)) & vacias if uno and 8 <= sq < 16 else 0
+            else:
+                uno = (1 << (sq - 8)) & vacias if sq >= 8 else 0
+                dos = (1 << (sq - 16)) & vacias if uno and 48 <= sq < 56 else 0
+            return uno | dos | (ATAQUES_PEON[color][sq] & rivales)
+        if tipo == CABALLO:
+            ataques = ATAQUES_CABALLO[sq]
+        elif tipo == REY:
+            ataques = ATAQUES_REY[sq]
+        elif tipo == ALFIL:
+            ataques = ataques_alfil(sq, self.total)
+        elif tipo == TORRE:
+            ataques = ataques_torre(sq, self.total)
+        else:
+            ataques = ataques_alfil(sq, self.total) | ataques_torre(sq, self.total)
+        return ataques & ~propias
@@ -0,0 +1,65 @@
+"""Buzón de 64 casillas con interfaz de diccionario.
+
+Responsabilidades:
+- Guardar la pieza (o None) de cada casilla en una lista plana indexada por y * 8 + x
+- Ofrecer el mismo acceso por coordenadas que el antiguo `Dict[(x, y), Pieza]`
+  (`get`, `[]`, `in`, `items`, `values`, `keys`) para no romper a quien lo usa
+"""
+from typing import Iterator, List, Optional, Tuple
+
+from .pieza import Pieza
+
+
+class Casillas:
+    """Vista por coordenadas (x, y) sobre una lista de 64 entradas."""
+
+    __slots__ = ('lista',)
+
+    def __init__(self, lista: Optional[List[Optional[Pieza]]] = None):
+        self.lista: List[Optional[Pieza]] = lista if lista is not None else [None] * 64
+
+    def get(self, pos: Tuple[int, int], defecto=None) -> Optional[Pieza]:
+        x, y = pos
+        if 0 <= x < 8 and 0 <= y < 8:
+            return self.lista[y * 8 + x]
+        return defecto
+
+    def __getitem__(self, pos: Tuple[int, int]) -> Optional[Pieza]:
+        x, y = pos
+        if 0 <= x < 8 and 0 <= y < 8:
+            return self.lista[y * 8 + x]
+        raise KeyError(pos)
+
+    def __setitem__(self, pos: Tuple[int, int], pieza: Optional[Pieza]):
+        x, y = pos
+        if not (0 <= x < 8 and 0 <= y < 8):
+            raise KeyError(pos)
+        self.lista[y * 8 + x] = pieza
+
+    def __contains__(self, pos) -> bool:
+        try:
+            x, y = pos
+        except (TypeError, ValueError):
+            return False
+        return 0 <= x < 8 and 0 <= y < 8
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return self.keys()
+
+    def __len__(self) -> int:
+        return 64
+
+    def keys(self) -> Iterator[Tuple[int, int]]:
+        for i in range(64):
+            yield (i & 7, i >> 3)
+
+    def values(self) -> List[Optional[Pieza]]:
+        return list(self.lista)
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], Optional[Pieza]]]:
+        for i, pieza in enumerate(self.lista):
+            yield (i & 7, i >> 3), pieza
+
+    def copy(self) -> 'Casillas':
+        """Copia superficial (comparte las piezas)."""
+        return Casillas(list(self.lista))
@@ -0,0 +1,474 @@
+"""Motor interno de ajedrez clásico en Python puro (alternativa a Stockfish).
+
+Uso:
+    python -m ajedrez_clasico.motor --fen "<fen>" --tiempo-ms 1000
+    python -m ajedrez_clasico.motor --bench
+
+Responsabilidades:
+- Búsqueda alfa-beta con profundización iterativa y presupuesto de tiempo
+- Tabla de transposición por clave Zobrist (profundidad, cota y mejor jugada)
+- Tablas por repetición mirando solo las jugadas desde el último movimiento
+  irreversible; esos valores dependen del camino y no se guardan en la tabla
+- Ordenación de jugadas: jugada de la tabla, capturas MVV-LVA y coronaciones
+- Búsqueda de quietud (solo capturas y coronaciones) en las hojas
+- Evaluación por material y tablas pieza-casilla (rey distinto en el final)
+- Medir nodos por segundo (`--bench`)
+
+Busca sobre una copia del `Tablero` con `hacer_movimiento`/`deshacer_movimiento`
+y el generador legal de bitboards; la partida original no se toca.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from modelos import TipoPieza
+from . import bitboard as bb
+from .tablero import Tablero
+
+# Valor de material por tipo de bitboard (PEON..REY)
+VALORES = (100, 320, 330, 500, 900, 20000)
+
+# Tablas pieza-casilla desde el punto de vista de las blancas, escritas de la
+# fila 8 (arriba) a la 1 (abajo) como se ve el tablero
+_PST_PEON = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+)
+_PST_CABALLO = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+_PST_ALFIL = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+_PST_TORRE = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0,
+)
+_PST_REINA = (
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20,
+)
+_PST_REY_MEDIO = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+)
+_PST_REY_FINAL = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+)
+
+
+def _tablas(pst_rey) -> List[List[int]]:
+    # TABLA[color * 6 + tipo][casilla]: material + posición con signo (positivo para blancas)
+    psts = (_PST_PEON, _PST_CABALLO, _PST_ALFIL, _PST_TORRE, _PST_REINA, pst_rey)
+    tablas = []
+    for color in (bb.BLANCO, bb.NEGRO):
+        for tipo in range(6):
+            tabla = []
+            for sq in range(64):
+                # Las tablas están escritas con la fila 8 primero; las negras se reflejan
+                indice = sq ^ 56 if color == bb.BLANCO else sq
+                valor = VALORES[tipo] + psts[tipo][indice]
+                tabla.append(valor if color == bb.BLANCO else -valor)
+            tablas.append(tabla)
+    return tablas
+
+
+TABLAS_MEDIO = _tablas(_PST_REY_MEDIO)
+TABLAS_FINAL = _tablas(_PST_REY_FINAL)
+
+MATE = 100000
+# Toda puntuación por encima es un mate (MATE - ply, con ply < 1000)
+MATE_MINIMO = MATE - 1000
+INFINITO = 10 ** 9
+# Cotas guardadas en la tabla de transposición
+EXACTA, INFERIOR, SUPERIOR = 0, 1, 2
+# Entradas máximas de la tabla de transposición antes de vaciarla
+MAX_TT = 1 << 20
+
+PROMOCION_INTERNA = {
+    bb.REINA: TipoPieza.REINA,
+    bb.TORRE: TipoPieza.TORRE,
+    bb.ALFIL: TipoPieza.ALFIL,
+    bb.CABALLO: TipoPieza.CABALLO,
+}
+LETRA_PROMOCION = {bb.REINA: "q", bb.TORRE: "r", bb.ALFIL: "b", bb.CABALLO: "n"}
+
+FILA_1 = 0xFF
+FILA_8 = 0xFF << 56
+
+# Jugada interna: (origen, destino, promocion) con casillas 0..63 y promoción como tipo de bitboard o -1
+Jugada = Tuple[int, int, int]
+
+
+def _a_tt(puntuacion: int, ply: int) -> int:
+    """Puntuación para la tabla de transposición: los mates, a distancia desde el nodo y no desde la raíz."""
+    if puntuacion >= MATE_MINIMO:
+        return puntuacion + ply
+    if puntuacion <= -MATE_MINIMO:
+        return puntuacion - ply
+    return puntuacion
+
+
+def _desde_tt(puntuacion: int, ply: int) -> int:
+    """Inversa de `_a_tt`: vuelve a medir los mates desde la raíz de la búsqueda actual."""
+    if puntuacion >= MATE_MINIMO:
+        return puntuacion - ply
+    if puntuacion <= -MATE_MINIMO:
+        return puntuacion + ply
+    return puntuacion
+
+
+class _TiempoAgotado(Exception):
+    pass
+
+
+def evaluar(tablero: Tablero) -> int:
+    """Material y tablas pieza-casilla, desde el punto de vista del bando que mueve."""
+    piezas = tablero.bitboards.piezas
+    # Final: sin damas, o con poco material aparte de peones y reyes
+    material = 0
+    for indice in (1, 2, 3, 4, 7, 8, 9, 10):
+        material += VALORES[indice % 6] * bin(piezas[indice]).count("1")
+    tablas = TABLAS_FINAL if (not piezas[4] and not piezas[10]) or material <= 2600 else TABLAS_MEDIO
+    puntuacion = 0
+    for indice in range(12):
+        tabla = tablas[indice]
+        b = piezas[indice]
+        while b:
+            bajo = b & -b
+            puntuacion += tabla[bajo.bit_length() - 1]
+            b ^= bajo
+    return puntuacion if tablero.turno.value == "blanco" else -puntuacion
+
+
+def a_uci(jugada: Jugada) -> str:
+    origen, destino, promocion = jugada
+    uci = bb.coordenadas(origen), bb.coordenadas(destino)
+    texto = "".join(f"{chr(ord('a') + x)}{y + 1}" for x, y in uci)
+    return texto + LETRA_PROMOCION[promocion] if promocion >= 0 else texto
+
+
+class MotorInterno:
+    """Búsqueda alfa-beta sobre el tablero clásico con presupuesto de tiempo.
+
+    `nodos`, `profundidad` y `nps` describen la última búsqueda. La tabla de
+    transposición se conserva entre llamadas (las posiciones de la partida se repiten).
+    """
+    def __init__(self):
+        self.tt: Dict[int, Tuple[int, int, int, Optional[Jugada]]] = {}
+        self.nodos = 0
+        self.profundidad = 0
+        self.nps = 0
+        self.puntuacion = 0
+        self._limite = 0.0
+        self._tablero: Optional[Tablero] = None
+        # Tablas por repetición vistas en la búsqueda (para no guardar valores que dependen del camino)
+        self._repeticiones = 0
+
+    def mejor_jugada(self, fen: str, tiempo_ms: Optional[int] = 1000,
+                     profundidad: Optional[int] = None) -> Optional[str]:
+        """Mejor jugada en LAN (e2e4, e7e8q) para `fen` dentro del presupuesto."""
+        tablero = Tablero()
+        tablero.cargar_fen(fen)
+        jugada = self.buscar(tablero, tiempo_ms, profundidad)
+        return a_uci(jugada) if jugada else None
+
+    def buscar(self, tablero: Tablero, tiempo_ms: Optional[int] = 1000,
+               profundidad: Optional[int] = None) -> Optional[Jugada]:
+        """Profundización iterativa hasta agotar el tiempo o alcanzar `profundidad`.
+
+        Devuelve la mejor jugada de la última iteración completa. `tablero`
+        se modifica durante la búsqueda y queda como estaba al terminar.
+        """
+        inicio = time.perf_counter()
+        self._limite = inicio + tiempo_ms / 1000.0 if tiempo_ms else float("inf")
+        self._tablero = tablero
+        self.nodos = 0
+        self.profundidad = 0
+        if len(self.tt) > MAX_TT:
+            self.tt.clear()
+
+        jugadas = self._jugadas(tablero)
+        if not jugadas:
+            return None
+        mejor = jugadas[0]
+        maxima = profundidad or 64
+        pila = len(tablero.pila_deshacer)
+        for prof in range(1, maxima + 1):
+            try:
+                puntuacion, jugada = self._raiz(prof)
+            except _TiempoAgotado:
+                while len(tablero.pila_deshacer) > pila:
+                    tablero.deshacer_movimiento()
+                break
+            if jugada is not None:
+                mejor = jugada
+            self.profundidad = prof
+            self.puntuacion = puntuacion
+            # Mate encontrado, o sin tiempo para otra iteración completa
+            if abs(puntuacion) >= MATE_MINIMO or time.perf_counter() >= self._limite:
+                break
+        segundos = time.perf_counter() - inicio
+        self.nps = int(self.nodos / segundos) if segundos > 0 else 0
+        return mejor
+
+    def _raiz(self, profundidad: int) -> Tuple[int, Optional[Jugada]]:
+        tablero = self._tablero
+        alfa, beta = -INFINITO, INFINITO
+        mejor = None
+        repeticiones = self._repeticiones
+        for jugada in self._ordenar(tablero, self._jugadas(tablero), self._jugada_tt(tablero.clave)):
+            self._hacer(jugada)
+            puntuacion = -self._alfabeta(profundidad - 1, -beta, -alfa, 1)
+            tablero.deshacer_movimiento()
+            if puntuacion > alfa:
+                alfa, mejor = puntuacion, jugada
+        self._guardar_tt(tablero.clave, profundidad, _a_tt(alfa, 0), EXACTA, mejor, repeticiones)
+        return alfa, mejor
+
+    def _alfabeta(self, profundidad: int, alfa: int, beta: int, ply: int) -> int:
+        tablero = self._tablero
+        self.nodos += 1
+        if not self.nodos & 1023 and time.perf_counter() >= self._limite:
+            raise _TiempoAgotado()
+        if tablero.medio_movimientos >= 100:
+            return 0
+        if self._es_repeticion(tablero):
+            self._repeticiones += 1
+            return 0
+        if profundidad <= 0:
+            return self._quietud(alfa, beta, ply)
+
+        clave = tablero.clave
+        entrada = self.tt.get(clave)
+        jugada_tt = None
+        if entrada is not None:
+            prof_tt, puntuacion_tt, cota, jugada_tt = entrada
+            puntuacion_tt = _desde_tt(puntuacion_tt, ply)
+            if prof_tt >= profundidad:
+                if cota == EXACTA:
+                    return puntuacion_tt
+                if cota == INFERIOR and puntuacion_tt >= beta:
+                    return puntuacion_tt
+                if cota == SUPERIOR and puntuacion_tt <= alfa:
+                    return puntuacion_tt
+
+        jugadas = self._jugadas(tablero)
+        if not jugadas:
+            return -(MATE - ply) if tablero.esta_en_jaque(tablero.turno) else 0
+
+        alfa_original = alfa
+        repeticiones = self._repeticiones
+        mejor_puntuacion, mejor = -INFINITO, None
+        for jugada in self._ordenar(tablero, jugadas, jugada_tt):
+            self._hacer(jugada)
+            puntuacion = -self._alfabeta(profundidad - 1, -beta, -alfa, ply + 1)
+            tablero.deshacer_movimiento()
+            if puntuacion > mejor_puntuacion:
+                mejor_puntuacion, mejor = puntuacion, jugada
+                if puntuacion > alfa:
+                    alfa = puntuacion
+                    if alfa >= beta:
+                        break
+        if mejor_puntuacion <= alfa_original:
+            cota = SUPERIOR
+        elif mejor_puntuacion >= beta:
+            cota = INFERIOR
+        else:
+            cota = EXACTA
+        self._guardar_tt(clave, profundidad, _a_tt(mejor_puntuacion, ply), cota, mejor, repeticiones)
+        return mejor_puntuacion
+
+    def _guardar_tt(self, clave: int, profundidad: int, puntuacion: int, cota: int,
+                    mejor: Optional[Jugada], repeticiones: int):
+        """Guarda la entrada; si el subárbol tocó una repetición, solo la jugada (para ordenar).
+
+        Con profundidad -1 la puntuación nunca se usa para cortar: una tabla por
+        repetición en este camino no vale para la misma posición por otro camino.
+        """
+        if self._repeticiones != repeticiones:
+            profundidad = -1
+        self.tt[clave] = (profundidad, puntuacion, cota, mejor)
+
+    @staticmethod
+    def _es_repeticion(tablero: Tablero) -> bool:
+        """La posición ya se dio desde el último movimiento irreversible (captura o peón).
+
+        Solo se comparan las posiciones con el mismo bando al mover (una de cada
+        dos) dentro de `medio_movimientos`, así que el coste no crece con la partida.
+        """
+        historial = tablero.historial_claves
+        actual = len(historial) - 1
+        clave = tablero.clave
+        inicio = max(0, actual - tablero.medio_movimientos)
+        for i in range(actual - 2, inicio - 1, -2):
+            if historial[i] == clave:
+                return True
+        return False
+
+    def _quietud(self, alfa: int, beta: int, ply: int) -> int:
+        tablero = self._tablero
+        self.nodos += 1
+        if not self.nodos & 1023 and time.perf_counter() >= self._limite:
+            raise _TiempoAgotado()
+        if tablero.esta_en_jaque(tablero.turno):
+            # En jaque no se puede "no jugar": se buscan todas las evasiones
+            jugadas = self._jugadas(tablero)
+            if not jugadas:
+                return -(MATE - ply)
+            actual = -INFINITO
+        else:
+            # Sin jugar nada (stand pat) el bando que mueve ya tiene esta evaluación
+            actual = evaluar(tablero)
+            if actual >= beta:
+                return actual
+            jugadas = self._jugadas(tablero, solo_tacticas=True)
+        if actual > alfa:
+            alfa = actual
+        for jugada in self._ordenar(tablero, jugadas, None):
+            self._hacer(jugada)
+            puntuacion = -self._quietud(-beta, -alfa, ply + 1)
+            tablero.deshacer_movimiento()
+            if puntuacion >= beta:
+                return puntuacion
+            if puntuacion > alfa:
+                alfa = puntuacion
+        return alfa
+
+    @staticmethod
+    def _jugadas(tablero: Tablero, solo_tacticas: bool = False) -> List[Jugada]:
+        """Jugadas legales del turno; con `solo_tacticas`, capturas y coronaciones.
+
+        Solo se coronan damas: la sub-coronación casi nunca cambia la evaluación.
+        """
+        bits = tablero.bitboards
+        color = bb.BLANCO if tablero.turno.value == "blanco" else bb.NEGRO
+        peones = bits.piezas[color * 6 + bb.PEON]
+        objetivos = bb.TODAS
+        if solo_tacticas:
+            objetivos = bits.ocupacion[color ^ 1] | (FILA_8 if color == bb.BLANCO else FILA_1)
+        jugadas = []
+        for origen, destino in bits.movimientos_legales(color, tablero.enroques, tablero.al_paso, objetivos):
+            if (peones >> origen) & 1 and (destino < 8 or destino >= 56):
+                jugadas.append((origen, destino, bb.REINA))
+            elif not solo_tacticas or (bits.total >> destino) & 1 or destino == tablero.al_paso:
+                jugadas.append((origen, destino, -1))
+        return jugadas
+
+    def _ordenar(self, tablero: Tablero, jugadas: List[Jugada], jugada_tt: Optional[Jugada]) -> List[Jugada]:
+        """Jugada de la tabla primero, luego capturas por MVV-LVA y coronaciones, luego el resto."""
+        bits = tablero.bitboards
+        rival = 1 if tablero.turno.value == "blanco" else 0
+        color = rival ^ 1
+        total = bits.total
+
+        def clave(jugada: Jugada) -> int:
+            if jugada == jugada_tt:
+                return -10 ** 7
+            origen, destino, promocion = jugada
+            valor = 0
+            if (total >> destino) & 1:
+                victima = bits.tipo_en(destino, rival)
+                atacante = bits.tipo_en(origen, color)
+                valor = 10 * VALORES[victima] - VALORES[atacante] + 100000
+            elif destino == tablero.al_paso:
+                valor = 100000 + 10 * VALORES[bb.PEON] - VALORES[bb.PEON]
+            if promocion >= 0:
+                valor += VALORES[promocion]
+            return -valor
+        return sorted(jugadas, key=clave)
+
+    def _jugada_tt(self, clave: int) -> Optional[Jugada]:
+        entrada = self.tt.get(clave)
+        return entrada[3] if entrada else None
+
+    def _hacer(self, jugada: Jugada):
+        origen, destino, promocion = jugada
+        self._tablero.hacer_movimiento(
+            bb.coordenadas(origen), bb.coordenadas(destino),
+            PROMOCION_INTERNA[promocion] if promocion >= 0 else None
+        )
+
+
+# Posiciones para `--bench`: (nombre, FEN)
+POSICIONES_BENCH = [
+    ("inicial", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"),
+    ("medio_juego", "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP2BPPP/R2QKB1R w KQ - 0 8"),
+    ("final", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"),
+]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Motor interno del ajedrez clásico")
+    parser.add_argument("--fen", default=POSICIONES_BENCH[0][1], help="posición en FEN")
+    parser.add_argument("--tiempo-ms", type=int, default=1000, help="presupuesto por jugada en ms")
+    parser.add_argument("--profundidad", type=int, default=None, help="profundidad máxima")
+    parser.add_argument("--bench", action="store_true", help="medir nodos/s en posiciones de referencia")
+    args = parser.parse_args(argv)
+
+    posiciones = POSICIONES_BENCH if args.bench else [("fen", args.fen)]
+    nodos = 0
+    segundos = 0.0
+    for nombre, fen in posiciones:
+        motor = MotorInterno()
+        inicio = time.perf_counter()
+        jugada = motor.mejor_jugada(fen, args.tiempo_ms, args.profundidad)
+        transcurrido = time.perf_counter() - inicio
+        nodos += motor.nodos
+        segundos += transcurrido
+        print(f"{nombre:12} jugada={jugada} prof={motor.profundidad} puntuacion={motor.puntuacion} "
+              f"nodos={motor.nodos} nps={motor.nps}")
+    if args.bench:
+        print(f"Total: nodos={nodos} nps={int(nodos / segundos) if segundos > 0 else 0}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Perft: conteo de nodos para medir velocidad y corrección del generador clásico.
+
+Uso:
+    python -m ajedrez_clasico.perft --depth 4
+    python -m ajedrez_clasico.perft --depth 3 --fen "<fen>" --divide
+    python -m ajedrez_clasico.perft --depth 3 --modo piezas
+    python -m ajedrez_clasico.perft --regresion
+
+Modos:
+- generador: `Tablero.movimientos_legales` + `hacer_movimiento`/`deshacer_movimiento` (búsqueda)
+- piezas: `Pieza.obtener_movimientos_validos` + `realizar_movimiento` (ruta de la interfaz)
+
+La regresión compara los conteos con python-chess sobre posiciones de referencia.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import chess
+except Exception:
+    chess = None
+
+from modelos import TipoPieza
+from .tablero import Tablero, PROMOCIONES
+
+FEN_INICIAL = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# (nombre, FEN, profundidad por defecto para la regresión)
+POSICIONES_REFERENCIA: List[Tuple[str, str, int]] = [
+    ("inicial", FEN_INICIAL, 4),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 3),
+    ("posicion3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 4),
+    ("posicion4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", 3),
+    ("posicion5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", 3),
+    ("posicion6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", 3),
+]
+
+
+LETRA_PROMOCION = {
+    TipoPieza.REINA: "q",
+    TipoPieza.TORRE: "r",
+    TipoPieza.ALFIL: "b",
+    TipoPieza.CABALLO: "n",
+}
+
+
+def a_uci(origen: Tuple[int, int], destino: Tuple[int, int],
+          promocion: Optional[TipoPieza] = None) -> str:
+    """Convierte coordenadas internas a notación UCI (e2e4, e7e8q)."""
+    uci = f"{chr(ord('a') + origen[0])}{origen[1] + 1}{chr(ord('a') + destino[0])}{destino[1] + 1}"
+    return uci + LETRA_PROMOCION[promocion] if promocion else uci
+
+
+def perft(tablero: Tablero, profundidad: int) -> int:
+    """Cuenta los nodos hoja a `profundidad` usando el generador legal y hacer/deshacer."""
+    if profundidad == 0:
+        return 1
+    movimientos = list(tablero.movimientos_legales())
+    if profundidad == 1:
+        return len(movimientos)
+    nodos = 0
+    for origen, destino, promocion in movimientos:
+        tablero.hacer_movimiento(origen, destino, promocion)
+        nodos += perft(tablero, profundidad - 1)
+        tablero.deshacer_movimiento()
+    return nodos
+
+
+def _movimientos_por_piezas(tablero: Tablero):
+    for origen, pieza in list(tablero.casillas.items()):
+        if pieza and pieza.color == tablero.turno:
+            for destino in pieza.obtener_movimientos_validos(tablero):
+                if pieza.tipo == TipoPieza.PEON and destino[1] in (0, 7):
+                    for promocion in PROMOCIONES:
+                        yield origen, destino, promocion
+                else:
+                    yield origen, destino, None
+
+
+def perft_piezas(tablero: Tablero, profundidad: int) -> int:
+    """Igual que `perft`, pero por la ruta de la interfaz: candidatos por pieza + `realizar_movimiento`."""
+    if profundidad == 0:
+        return 1
+    nodos = 0
+    for origen, destino, promocion in list(_movimientos_por_piezas(tablero)):
+        if tablero.realizar_movimiento(origen, destino, promocion):
+            nodos += perft_piezas(tablero, profundidad - 1)
+            tablero.deshacer_movimiento()
+    return nodos
+
+
+def dividir(tablero: Tablero, profundidad: int, modo: str = "generador") -> Dict[str, int]:
+    """Conteo por jugada raíz (salida 'divide'), en notación UCI."""
+    resultado = {}
+    if modo == "piezas":
+        for origen, destino, promocion in list(_movimientos_por_piezas(tablero)):
+            if tablero.realizar_movimiento(origen, destino, promocion):
+                resultado[a_uci(origen, destino, promocion)] = perft_piezas(tablero, profundidad - 1)
+                tablero.deshacer_movimiento()
+    else:
+        for origen, destino, promocion in list(tablero.movimientos_legales()):
+            tablero.hacer_movimiento(origen, destino, promocion)
+            resultado[a_uci(origen, destino, promocion)] = perft(tablero, profundidad - 1)
+            tablero.deshacer_movimiento()
+    return resultado
+
+
+def perft_referencia(fen: str, profundidad: int) -> int:
+    """Perft de python-chess para la misma posición."""
+    board = chess.Board(fen)
+
+    def contar(d: int) -> int:
+        if d == 1:
+            return board.legal_moves.count()
+        nodos = 0
+        for move in board.legal_moves:
+            board.push(move)
+            nodos += contar(d - 1)
+            board.pop()
+        return nodos
+
+    return contar(profundidad) if profundidad > 0 else 1
+
+
+def regresion(profundidad: int = 0) -> bool:
+    """Compara el conteo propio con python-chess en `POSICIONES_REFERENCIA`; True si todo coincide."""
+    if chess is None:
+        print("python-chess no está instalado; no se puede ejecutar la regresión.")
+        return False
+    correcto = True
+    for nombre, fen, prof_defecto in POSICIONES_REFERENCIA:
+        prof = profundidad or prof_defecto
+        tablero = Tablero()
+        tablero.cargar_fen(fen)
+        inicio = time.perf_counter()
+        nodos = perft(tablero, prof)
+        segundos = time.perf_counter() - inicio
+        esperado = perft_referencia(fen, prof)
+        estado = "OK" if nodos == esperado else "FALLO"
+        correcto = correcto and nodos == esperado
+        print(f"{estado:5} {nombre:10} prof={prof} nodos={nodos} esperado={esperado} "
+              f"nps={int(nodos / segundos) if segundos > 0 else 0}")
+    return correcto
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Perft del motor de ajedrez clásico")
+    parser.add_argument("--depth", type=int, default=None,
+                        help="profundidad en medias jugadas (3 por defecto; en regresión, la de cada posición)")
+    parser.add_argument("--fen", default=FEN_INICIAL, help="posición inicial en FEN")
+    parser.add_argument("--divide", action="store_true", help="mostrar nodos por jugada raíz")
+    parser.add_argument("--modo", choices=("generador", "piezas"), default="generador")
+    parser.add_argument("--regresion", action="store_true",
+                        help="comparar con python-chess en posiciones de referencia")
+    args = parser.parse_args(argv)
+
+    if args.regresion:
+        return 0 if regresion(args.depth or 0) else 1
+
+    profundidad = args.depth if args.depth is not None else 3
+    tablero = Tablero()
+    tablero.cargar_fen(args.fen)
+    inicio = time.perf_counter()
+    if args.divide:
+        por_jugada = dividir(tablero, profundidad, args.modo)
+        for jugada in sorted(por_jugada):
+            print(f"{jugada}: {por_jugada[jugada]}")
+        nodos = sum(por_jugada.values())
+    elif args.modo == "piezas":
+        nodos = perft_piezas(tablero, profundidad)
+    else:
+        nodos = perft(tablero, profundidad)
+    segundos = time.perf_counter() - inicio
+    print(f"Nodos: {nodos}")
+    print(f"Tiempo: {segundos:.3f} s")
+    print(f"Nodos/s: {int(nodos / segundos) if segundos > 0 else 0}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,66 @@
 """Modelo de pieza y generación de movimientos candidatos.
 
 Responsabilidades:
-- Mantener estado por pieza (color, tipo, posición, imagen)
+- Mantener estado por pieza (color, tipo, posición, movimientos)
 - Proveer movimientos por tipo, sin validar reglas globales (jaque, etc.)
+- Incluir enroque y captura al paso según los derechos que mantiene el tablero
+- Recorrer tablas de saltos y rayos precalculadas por casilla (sin aritmética por llamada)
 """
 from __future__ import annotations
-import pygame
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from modelos import Color, TipoPieza
+from .bitboard import (ENROQUE_CORTO_BLANCO, ENROQUE_LARGO_BLANCO,
+                       ENROQUE_CORTO_NEGRO, ENROQUE_LARGO_NEGRO)
+
+def _saltos(desplazamientos) -> Dict[Tuple[int, int], Tuple[Tuple[int, int], ...]]:
+    tabla = {}
+    for x in range(8):
+        for y in range(8):
+            tabla[(x, y)] = tuple(
+                (x + dx, y + dy) for dx, dy in desplazamientos
+                if 0 <= x + dx < 8 and 0 <= y + dy < 8
+            )
+    return tabla
+
+
+def _rayos(direcciones) -> Dict[Tuple[int, int], Tuple[Tuple[Tuple[int, int], ...], ...]]:
+    tabla = {}
+    for x in range(8):
+        for y in range(8):
+            rayos = []
+            for dx, dy in direcciones:
+                rayo = []
+                nx, ny = x + dx, y + dy
+                while 0 <= nx < 8 and 0 <= ny < 8:
+                    rayo.append((nx, ny))
+                    nx, ny = nx + dx, ny + dy
+                if rayo:
+                    rayos.append(tuple(rayo))
+            tabla[(x, y)] = tuple(rayos)
+    return tabla
+
+
+# Tablas precalculadas por casilla: destinos de salto y rayos (casillas en orden de alejamiento)
+SALTOS_CABALLO = _saltos([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+PASOS_REY = _saltos([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy])
+RAYOS_TORRE = _rayos([(0, 1), (1, 0), (0, -1), (-1, 0)])
+RAYOS_ALFIL = _rayos([(1, 1), (1, -1), (-1, 1), (-1, -1)])
+RAYOS_REINA = {pos: RAYOS_TORRE[pos] + RAYOS_ALFIL[pos] for pos in RAYOS_TORRE}
+
 
 class Pieza:
+    # Sin __dict__: las partidas de análisis mantienen miles de piezas en memoria
+    __slots__ = ('color', 'tipo', 'posicion', 'movimientos')
+
     def __init__(self, color: Color, tipo: TipoPieza):
-        """Crea una pieza con su color y tipo; posición e imagen se asignan desde el tablero."""
+        """Crea una pieza con su color y tipo; la posición se asigna desde el tablero.
+
+        La imagen no forma parte de la pieza: la interfaz la busca por color/tipo.
+        """
         self.color = color
         self.tipo = tipo
         self.posicion = None
         self.movimientos = 0
-        self.imagen = None
         
     def obtener_movimientos_validos(self, tablero) -> List[Tuple[int, int]]:
         tipo_val = getattr(self.tipo, 'value', None)
@@ -35,7 +79,7 @@ class Pieza:
         return []
     
     def _movimientos_peon(self, tablero) -> List[Tuple[int, int]]:
-        """Genera movimientos del peón (avance y capturas diagonales)."""
+        """Genera movimientos del peón (avance, capturas diagonales y captura al paso)."""
         movimientos = []
         x, y = self.posicion
         
@@ -47,8 +91,8 @@ class Pieza:
         if 0 <= nueva_pos[1] < 8 and tablero.casillas.get(nueva_pos) is None:
             movimientos.append(nueva_pos)
             
-            # Movimiento inicial (2 casillas)
-            if self.movimientos == 0:
+            # Movimiento inicial (2 casillas), desde la fila de salida
+            if y == (1 if direccion == 1 else 6):
                 nueva_pos = (x, y + 2 * direccion)
                 if 0 <= nueva_pos[1] < 8 and tablero.casillas.get(nueva_pos) is None:
                     movimientos.append(nueva_pos)
@@ -59,118 +103,74 @@ class Pieza:
             if 0 <= nueva_pos[0] < 8 and 0 <= nueva_pos[1] < 8:
                 if tablero.casillas.get(nueva_pos) and tablero.casillas[nueva_pos].color != self.color:
                     movimientos.append(nueva_pos)
+                elif (getattr(tablero, 'al_paso', -1) == nueva_pos[1] * 8 + nueva_pos[0]
+                      and getattr(tablero, 'turno', self.color) == self.color
+                      and y == (4 if direccion == 1 else 3)):
+                    # Al paso: solo el bando que mueve, con el peón en su quinta fila
+                    movimientos.append(nueva_pos)
         
         return movimientos
     
     def _movimientos_torre(self, tablero) -> List[Tuple[int, int]]:
         """Genera movimientos en líneas rectas hasta encontrar bloqueo o borde."""
-        movimientos = []
-        x, y = self.posicion
-        
-        # Direcciones: horizontal y vertical
-        direcciones = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-        
-        for dx, dy in direcciones:
-            for i in range(1, 8):
-                nueva_pos = (x + i * dx, y + i * dy)
-                
-                # Verificar si está dentro del tablero
-                if not (0 <= nueva_pos[0] < 8 and 0 <= nueva_pos[1] < 8):
-                    break
-                
-                # Verificar si hay una pieza en la casilla
-                if nueva_pos in tablero.casillas and tablero.casillas[nueva_pos]:
-                    # Si es una pieza enemiga, se puede capturar
-                    if tablero.casillas[nueva_pos].color != self.color:
-                        movimientos.append(nueva_pos)
-                    break
-                
-                movimientos.append(nueva_pos)
-        
-        return movimientos
+        return self._deslizar(tablero, RAYOS_TORRE[self.posicion])
     
     def _movimientos_alfil(self, tablero) -> List[Tuple[int, int]]:
         """Genera movimientos diagonales hasta encontrar bloqueo o borde."""
-        movimientos = []
-        x, y = self.posicion
-        
-        # Direcciones diagonales
-        direcciones = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
-        
-        for dx, dy in direcciones:
-            for i in range(1, 8):
-                nueva_pos = (x + i * dx, y + i * dy)
-                
-                # Verificar si está dentro del tablero
-                if not (0 <= nueva_pos[0] < 8 and 0 <= nueva_pos[1] < 8):
-                    break
-                
-                # Verificar si hay una pieza en la casilla
-                if nueva_pos in tablero.casillas and tablero.casillas[nueva_pos]:
-                    # Si es una pieza enemiga, se puede capturar
-                    if tablero.casillas[nueva_pos].color != self.color:
-                        movimientos.append(nueva_pos)
-                    break
-                
-                movimientos.append(nueva_pos)
-        
-        return movimientos
+        return self._deslizar(tablero, RAYOS_ALFIL[self.posicion])
     
     def _movimientos_caballo(self, tablero) -> List[Tuple[int, int]]:
         """Genera saltos en L (caballo), ignorando ocupación intermedia."""
-        movimientos = []
-        x, y = self.posicion
-        
-        # Movimientos del caballo (en L)
-        desplazamientos = [
-            (1, 2), (2, 1), (2, -1), (1, -2),
-            (-1, -2), (-2, -1), (-2, 1), (-1, 2)
-        ]
-        
-        for dx, dy in desplazamientos:
-            nueva_pos = (x + dx, y + dy)
-            
-            # Verificar si está dentro del tablero
-            if not (0 <= nueva_pos[0] < 8 and 0 <= nueva_pos[1] < 8):
-                continue
-            
-            # Verificar si hay una pieza en la casilla
-            if nueva_pos in tablero.casillas and tablero.casillas[nueva_pos]:
-                # Si es una pieza enemiga, se puede capturar
-                if tablero.casillas[nueva_pos].color != self.color:
-                    movimientos.append(nueva_pos)
-            else:
-                movimientos.append(nueva_pos)
-        
-        return movimientos
+        return self._saltar(tablero, SALTOS_CABALLO[self.posicion])
     
     def _movimientos_reina(self, tablero) -> List[Tuple[int, int]]:
         """Combina movimientos de torre y alfil."""
-        return self._movimientos_torre(tablero) + self._movimientos_alfil(tablero)
+        return self._deslizar(tablero, RAYOS_REINA[self.posicion])
     
     def _movimientos_rey(self, tablero) -> List[Tuple[int, int]]:
-        """Genera movimientos a casillas adyacentes (sin enroque)."""
+        """Genera movimientos a casillas adyacentes y enroques con camino libre.
+
+        El enroque solo exige el derecho (`tablero.enroques`) y casillas vacías;
+        que el rey no pase por casillas atacadas lo valida el tablero.
+        """
+        movimientos = self._saltar(tablero, PASOS_REY[self.posicion])
+        enroques = getattr(tablero, 'enroques', 0)
+        fila = 0 if getattr(self.color, 'value', None) == 'blanco' else 7
+        if enroques and self.posicion == (4, fila):
+            casillas = tablero.casillas
+            if fila == 0:
+                corto, largo = ENROQUE_CORTO_BLANCO, ENROQUE_LARGO_BLANCO
+            else:
+                corto, largo = ENROQUE_CORTO_NEGRO, ENROQUE_LARGO_NEGRO
+            if enroques & corto and casillas.get((5, fila)) is None and casillas.get((6, fila)) is None:
+                movimientos.append((6, fila))
+            if (enroques & largo and casillas.get((3, fila)) is None
+                    and casillas.get((2, fila)) is None and casillas.get((1, fila)) is None):
+                movimientos.append((2, fila))
+        return movimientos
+
+    def _deslizar(self, tablero, rayos) -> List[Tuple[int, int]]:
+        """Recorre rayos precalculados hasta la primera pieza (capturable si es rival)."""
         movimientos = []
-        x, y = self.posicion
-        
-        # El rey puede moverse una casilla en cualquier dirección
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                
-                nueva_pos = (x + dx, y + dy)
-                
-                # Verificar si está dentro del tablero
-                if not (0 <= nueva_pos[0] < 8 and 0 <= nueva_pos[1] < 8):
-                    continue
-                
-                # Verificar si hay una pieza en la casilla
-                if nueva_pos in tablero.casillas and tablero.casillas[nueva_pos]:
-                    # Si es una pieza enemiga, se puede capturar
-                    if tablero.casillas[nueva_pos].color != self.color:
-                        movimientos.append(nueva_pos)
-                else:
-                    movimientos.append(nueva_pos)
-        
+        casillas = tablero.casillas
+        color = self.color
+        for rayo in rayos:
+            for pos in rayo:
+                ocupante = casillas.get(pos)
+                if ocupante:
+                    if ocupante.color != color:
+                        movimientos.append(pos)
+                    break
+                movimientos.append(pos)
+        return movimientos
+
+    def _saltar(self, tablero, destinos) -> List[Tuple[int, int]]:
+        """Filtra destinos precalculados ocupados por piezas propias."""
+        movimientos = []
+        casillas = tablero.casillas
+        color = self.color
+        for pos in destinos:
+            ocupante = casillas.get(pos)
+            if not ocupante or ocupante.color != color:
+                movimientos.append(pos)
         return movimientos
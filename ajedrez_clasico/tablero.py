@@ -1,115 +1,370 @@
 """Lógica del tablero y estado del juego.
 
 Responsabilidades:
-- Mantener casillas, turno y estado (jugando, jaque, mate)
-- Ejecutar movimientos y validar jaque/jaque mate básicos
-- Inicializar las piezas en posiciones estándar
+- Mantener casillas, turno y estado (jugando, jaque, mate, ahogado)
+- Ejecutar movimientos (incluidos enroque, captura al paso y coronación) y validar jaque/jaque mate
+- Generar todos los movimientos legales del bando con clavadas y evasiones de jaque
+- Mantener la clave Zobrist de la posición y detectar la triple repetición
+- Hacer/deshacer movimientos con una pila de deshacer (búsqueda y "takeback")
+- Inicializar las piezas en posiciones estándar y leer/escribir FEN completo
+
+`casillas` sigue siendo la vista pública por coordenadas (un buzón de 64
+entradas con interfaz de diccionario); la validación de
+movimientos, jaque y jaque mate se resuelve sobre los bitboards de `bitboards`,
+que se mantienen sincronizados en cada movimiento.
 """
-from typing import List, Tuple, Optional, Dict
-from modelos import Color, TipoPieza, EstadoJuego, GestorRecursos
+from typing import List, Tuple, Optional, NamedTuple, TYPE_CHECKING
+from modelos import Color, TipoPieza, EstadoJuego
 from .pieza import Pieza
+from .casillas import Casillas
+from . import bitboard as bb
+from . import zobrist
+
+if TYPE_CHECKING:
+    from modelos import GestorRecursos
+
+COLOR_BB = {Color.BLANCO: bb.BLANCO, Color.NEGRO: bb.NEGRO}
+TIPO_BB = {
+    TipoPieza.PEON: bb.PEON,
+    TipoPieza.CABALLO: bb.CABALLO,
+    TipoPieza.ALFIL: bb.ALFIL,
+    TipoPieza.TORRE: bb.TORRE,
+    TipoPieza.REINA: bb.REINA,
+    TipoPieza.REY: bb.REY,
+}
+
+FEN_TIPO = {
+    'p': TipoPieza.PEON,
+    'n': TipoPieza.CABALLO,
+    'b': TipoPieza.ALFIL,
+    'r': TipoPieza.TORRE,
+    'q': TipoPieza.REINA,
+    'k': TipoPieza.REY,
+}
+TIPO_FEN = {tipo: letra for letra, tipo in FEN_TIPO.items()}
+
+# Piezas a las que puede coronar un peón, en el orden en que se generan
+PROMOCIONES = (TipoPieza.REINA, TipoPieza.TORRE, TipoPieza.ALFIL, TipoPieza.CABALLO)
+
+ENROQUES_FEN = (
+    (bb.ENROQUE_CORTO_BLANCO, 'K'),
+    (bb.ENROQUE_LARGO_BLANCO, 'Q'),
+    (bb.ENROQUE_CORTO_NEGRO, 'k'),
+    (bb.ENROQUE_LARGO_NEGRO, 'q'),
+)
+
+class EntradaDeshacer(NamedTuple):
+    """Lo necesario para revertir un movimiento hecho con `hacer_movimiento`."""
+    origen: Tuple[int, int]
+    destino: Tuple[int, int]
+    pieza: Pieza
+    capturada: Optional[Pieza]
+    movimientos: int
+    estado: EstadoJuego
+    turno: Color
+    clave: int
+    enroques: int
+    al_paso: int
+    medio_movimientos: int
+    # Casilla de la pieza capturada (difiere de `destino` en la captura al paso)
+    casilla_captura: Tuple[int, int]
+    # (origen, destino) de la torre si el movimiento fue un enroque
+    torre: Optional[Tuple[Tuple[int, int], Tuple[int, int]]]
+    # Pieza nueva colocada en `destino` si el movimiento fue una coronación
+    promovida: Optional[Pieza]
 
 class Tablero:
-    def __init__(self, gestor_recursos: GestorRecursos):
-        """Inicializa el tablero con recursos y disposición inicial."""
-        self.casillas: Dict[Tuple[int, int], Optional[Pieza]] = {}
+    def __init__(self, gestor_recursos: Optional["GestorRecursos"] = None):
+        """Inicializa el tablero con recursos y disposición inicial.
+
+        Las imágenes las resuelve la interfaz por color/tipo; el tablero no las
+        necesita, así que puede crearse sin pygame (análisis, servidores).
+        """
+        self.casillas = Casillas()
+        self.bitboards = bb.Bitboards()
+        # Casilla (índice 0..63) del rey de cada color, o -1 si no está
+        self.reyes: List[int] = [-1, -1]
         self.estado = EstadoJuego.JUGANDO
         self.turno = Color.BLANCO
         self.historial_movimientos: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+        self.pila_deshacer: List[EntradaDeshacer] = []
+        # Clave Zobrist de la posición actual y de cada posición de la partida
+        self.clave = 0
+        self.historial_claves: List[int] = []
+        # Derechos de enroque (bits bb.ENROQUE_*), casilla al paso (-1 si no hay) y contadores FEN
+        self.enroques = 0
+        self.al_paso = -1
+        self.medio_movimientos = 0
+        self.numero_jugada = 1
         self.gestor_recursos = gestor_recursos
         self.inicializar_tablero()
-        
-    def realizar_movimiento(self, origen: Tuple[int, int], 
-                           destino: Tuple[int, int]) -> bool:
-        """Intenta mover una pieza de origen a destino; actualiza turno y estado."""
+
+    def realizar_movimiento(self, origen: Tuple[int, int],
+                           destino: Tuple[int, int],
+                           promocion: Optional[TipoPieza] = None) -> bool:
+        """Intenta mover una pieza de origen a destino; actualiza turno y estado.
+
+        `promocion` elige la pieza al coronar (reina por defecto).
+        """
         try:
             if origen not in self.casillas:
                 return False
-                
+
             pieza = self.casillas[origen]
             if pieza is None or pieza.color != self.turno:
                 return False
-                
-            movimientos_validos = pieza.obtener_movimientos_validos(self)
-            if destino not in movimientos_validos:
+            if destino not in self.casillas:
                 return False
-            
-            pieza_destino = self.casillas.get(destino)
-            self.casillas[destino] = pieza
-            self.casillas[origen] = None
-            posicion_anterior = pieza.posicion
-            pieza.posicion = destino
-            pieza.movimientos += 1
-            
-            color_actual = pieza.color
-            if self.esta_en_jaque(color_actual):
-                self.casillas[origen] = pieza
-                self.casillas[destino] = pieza_destino
-                pieza.posicion = posicion_anterior
-                pieza.movimientos -= 1
+            if promocion is not None and promocion not in PROMOCIONES:
                 return False
-            
-            self.historial_movimientos.append((origen, destino))
-            
-            color_oponente = Color.NEGRO if color_actual == Color.BLANCO else Color.BLANCO
-            self.turno = color_oponente
-            
+
+            sq_origen = bb.casilla(*origen)
+            sq_destino = bb.casilla(*destino)
+            legales = self.bitboards.movimientos_legales(COLOR_BB[pieza.color], self.enroques, self.al_paso)
+            if (sq_origen, sq_destino) not in legales:
+                return False
+
+            self.hacer_movimiento(origen, destino, promocion)
+
+            color_oponente = self.turno
+            sin_movimientos = not self._tiene_movimientos(color_oponente)
             if self.esta_en_jaque(color_oponente):
-                if self.esta_en_jaque_mate(color_oponente):
-                    self.estado = EstadoJuego.JAQUE_MATE
-                else:
-                    self.estado = EstadoJuego.JAQUE
+                self.estado = EstadoJuego.JAQUE_MATE if sin_movimientos else EstadoJuego.JAQUE
+            elif sin_movimientos:
+                self.estado = EstadoJuego.EMPATE
             else:
                 self.estado = EstadoJuego.JUGANDO
-            
+            if self.estado != EstadoJuego.JAQUE_MATE and self.repeticiones() >= 3:
+                self.estado = EstadoJuego.EMPATE
+
             return True
         except Exception as e:
             print(f"Error en realizar_movimiento: {e}")
             return False
-            
+
+    def hacer_movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int],
+                         promocion: Optional[TipoPieza] = None):
+        """Aplica un movimiento sin validarlo y lo apila para poder deshacerlo.
+
+        Actualiza casillas, bitboards, reyes, clave, enroques, casilla al paso,
+        contadores, historial y turno; el estado (jaque, mate) queda a cargo de
+        quien llama. Un rey que se desplaza dos columnas enroca, un peón que
+        entra en la casilla al paso captura al paso y uno que llega a la última
+        fila corona en `promocion` (reina por defecto).
+        """
+        bits = self.bitboards
+        casillas = self.casillas
+        pieza = casillas[origen]
+        color = COLOR_BB[pieza.color]
+        rival = color ^ 1
+        tipo = TIPO_BB[pieza.tipo]
+        sq_origen = bb.casilla(*origen)
+        sq_destino = bb.casilla(*destino)
+
+        casilla_captura = destino
+        torre = None
+        promovida = None
+        if tipo == bb.PEON:
+            if sq_destino == self.al_paso and casillas.get(destino) is None:
+                casilla_captura = (destino[0], origen[1])
+            if destino[1] in (0, 7):
+                promovida = self._crear_pieza(pieza.color, promocion or TipoPieza.REINA, destino)
+                promovida.movimientos = pieza.movimientos + 1
+        elif tipo == bb.REY and abs(destino[0] - origen[0]) == 2:
+            if destino[0] > origen[0]:
+                torre = ((7, origen[1]), (5, origen[1]))
+            else:
+                torre = ((0, origen[1]), (3, origen[1]))
+        capturada = casillas.get(casilla_captura)
+
+        self.pila_deshacer.append(EntradaDeshacer(
+            origen, destino, pieza, capturada, pieza.movimientos, self.estado, self.turno, self.clave,
+            self.enroques, self.al_paso, self.medio_movimientos, casilla_captura, torre, promovida
+        ))
+
+        claves_pieza = zobrist.PIEZAS[color * 6 + tipo]
+        clave = self.clave ^ claves_pieza[sq_origen] ^ zobrist.TURNO_NEGRO ^ zobrist.ENROQUES[self.enroques]
+        if self.al_paso >= 0:
+            clave ^= zobrist.AL_PASO[self.al_paso & 7]
+
+        if capturada is not None:
+            sq_captura = bb.casilla(*casilla_captura)
+            tipo_capturada = TIPO_BB[capturada.tipo]
+            bits.quitar(sq_captura, rival, tipo_capturada)
+            clave ^= zobrist.PIEZAS[rival * 6 + tipo_capturada][sq_captura]
+            casillas[casilla_captura] = None
+            capturada.posicion = None
+
+        bits.mover(sq_origen, sq_destino, color, tipo)
+        if promovida is not None:
+            tipo_promovida = TIPO_BB[promovida.tipo]
+            bits.quitar(sq_destino, color, bb.PEON)
+            bits.poner(sq_destino, color, tipo_promovida)
+            clave ^= zobrist.PIEZAS[color * 6 + tipo_promovida][sq_destino]
+            casillas[destino] = promovida
+            pieza.posicion = None
+        else:
+            clave ^= claves_pieza[sq_destino]
+            casillas[destino] = pieza
+            pieza.posicion = destino
+        casillas[origen] = None
+        pieza.movimientos += 1
+
+        if tipo == bb.REY:
+            self.reyes[color] = sq_destino
+        if torre is not None:
+            torre_origen, torre_destino = torre
+            pieza_torre = casillas[torre_origen]
+            sq_torre_origen = bb.casilla(*torre_origen)
+            sq_torre_destino = bb.casilla(*torre_destino)
+            bits.mover(sq_torre_origen, sq_torre_destino, color, bb.TORRE)
+            claves_torre = zobrist.PIEZAS[color * 6 + bb.TORRE]
+            clave ^= claves_torre[sq_torre_origen] ^ claves_torre[sq_torre_destino]
+            casillas[torre_destino] = pieza_torre
+            casillas[torre_origen] = None
+            pieza_torre.posicion = torre_destino
+            pieza_torre.movimientos += 1
+
+        self.enroques &= bb.CONSERVA_ENROQUES[sq_origen] & bb.CONSERVA_ENROQUES[sq_destino]
+        clave ^= zobrist.ENROQUES[self.enroques]
+        self.al_paso = -1
+        if tipo == bb.PEON and abs(sq_destino - sq_origen) == 16:
+            al_paso = (sq_origen + sq_destino) // 2
+            # Solo se anota si algún peón rival puede capturar (así coincide con la clave de repetición)
+            if bb.ATAQUES_PEON[color][al_paso] & bits.piezas[rival * 6 + bb.PEON]:
+                self.al_paso = al_paso
+                clave ^= zobrist.AL_PASO[al_paso & 7]
+
+        self.medio_movimientos = 0 if tipo == bb.PEON or capturada is not None else self.medio_movimientos + 1
+        if pieza.color == Color.NEGRO:
+            self.numero_jugada += 1
+        self.clave = clave
+        self.historial_claves.append(clave)
+        self.historial_movimientos.append((origen, destino))
+        self.turno = Color.NEGRO if pieza.color == Color.BLANCO else Color.BLANCO
+
+    def deshacer_movimiento(self) -> bool:
+        """Revierte el último movimiento de la pila; devuelve False si no hay nada que deshacer."""
+        if not self.pila_deshacer:
+            return False
+        entrada = self.pila_deshacer.pop()
+        bits = self.bitboards
+        casillas = self.casillas
+        pieza = entrada.pieza
+        capturada = entrada.capturada
+        promovida = entrada.promovida
+
+        color = COLOR_BB[pieza.color]
+        tipo = TIPO_BB[pieza.tipo]
+        sq_origen = bb.casilla(*entrada.origen)
+        sq_destino = bb.casilla(*entrada.destino)
+        if promovida is not None:
+            bits.quitar(sq_destino, color, TIPO_BB[promovida.tipo])
+            bits.poner(sq_destino, color, bb.PEON)
+            promovida.posicion = None
+        bits.mover(sq_destino, sq_origen, color, tipo)
+        if tipo == bb.REY:
+            self.reyes[color] = sq_origen
+        casillas[entrada.destino] = None
+        casillas[entrada.origen] = pieza
+        pieza.posicion = entrada.origen
+        pieza.movimientos = entrada.movimientos
+
+        if entrada.torre is not None:
+            torre_origen, torre_destino = entrada.torre
+            pieza_torre = casillas[torre_destino]
+            bits.mover(bb.casilla(*torre_destino), bb.casilla(*torre_origen), color, bb.TORRE)
+            casillas[torre_origen] = pieza_torre
+            casillas[torre_destino] = None
+            pieza_torre.posicion = torre_origen
+            pieza_torre.movimientos -= 1
+
+        if capturada is not None:
+            bits.poner(bb.casilla(*entrada.casilla_captura), color ^ 1, TIPO_BB[capturada.tipo])
+            casillas[entrada.casilla_captura] = capturada
+            capturada.posicion = entrada.casilla_captura
+
+        if pieza.color == Color.NEGRO:
+            self.numero_jugada -= 1
+        self.enroques = entrada.enroques
+        self.al_paso = entrada.al_paso
+        self.medio_movimientos = entrada.medio_movimientos
+        self.historial_movimientos.pop()
+        self.historial_claves.pop()
+        self.clave = entrada.clave
+        self.estado = entrada.estado
+        self.turno = entrada.turno
+        return True
+
+    def repeticiones(self) -> int:
+        """Cuántas veces se ha dado la posición actual (mismas piezas y turno) en la partida."""
+        return self.historial_claves.count(self.clave)
+
     def esta_en_jaque(self, color: Color) -> bool:
         """Comprueba si el rey del color indicado está bajo ataque."""
-        posicion_rey = None
-        for pos, pieza in self.casillas.items():
-            if pieza and pieza.color == color and pieza.tipo == TipoPieza.REY:
-                posicion_rey = pos
-                break
-        if not posicion_rey:
+        c = COLOR_BB[color]
+        rey = self.reyes[c]
+        if rey < 0:
             return False
-        for pos, pieza in self.casillas.items():
-            if pieza and pieza.color != color:
-                movimientos = pieza.obtener_movimientos_validos(self)
-                if posicion_rey in movimientos:
-                    return True
-        return False
-        
+        return self.bitboards.atacada(rey, c ^ 1)
+
+    def movimientos_legales(self, color: Optional[Color] = None):
+        """Genera los movimientos legales del color indicado (por defecto, el turno).
+
+        Cada movimiento es una tupla (origen, destino, promocion) con coordenadas
+        (x, y); `promocion` es None salvo en las coronaciones, que aparecen una vez
+        por cada pieza posible.
+        """
+        color = color or self.turno
+        c = COLOR_BB[color]
+        peones = self.bitboards.piezas[c * 6 + bb.PEON]
+        coordenadas = bb.coordenadas
+        for origen, destino in self._generar(color):
+            if (peones >> origen) & 1 and (destino < 8 or destino >= 56):
+                for tipo in PROMOCIONES:
+                    yield coordenadas(origen), coordenadas(destino), tipo
+            else:
+                yield coordenadas(origen), coordenadas(destino), None
+
+    def _generar(self, color: Color):
+        """Pares (origen, destino) en índices 0..63; la captura al paso solo vale para el turno."""
+        al_paso = self.al_paso if color == self.turno else -1
+        return self.bitboards.movimientos_legales(COLOR_BB[color], self.enroques, al_paso)
+
+    def _tiene_movimientos(self, color: Color) -> bool:
+        return next(self._generar(color), None) is not None
+
     def esta_en_jaque_mate(self, color: Color) -> bool:
         """Determina si el color indicado está en jaque y no tiene movimientos que lo eviten."""
-        if not self.esta_en_jaque(color):
-            return False
-        for pos, pieza in self.casillas.items():
-            if pieza and pieza.color == color:
-                movimientos = pieza.obtener_movimientos_validos(self)
-                for mov in movimientos:
-                    pieza_destino = self.casillas.get(mov)
-                    self.casillas[mov] = pieza
-                    self.casillas[pos] = None
-                    posicion_anterior = pieza.posicion
-                    pieza.posicion = mov
-                    sigue_en_jaque = self.esta_en_jaque(color)
-                    self.casillas[pos] = pieza
-                    self.casillas[mov] = pieza_destino
-                    pieza.posicion = posicion_anterior
-                    if not sigue_en_jaque:
-                        return False
-        return True
-        
+        return self.esta_en_jaque(color) and not self._tiene_movimientos(color)
+
+    def esta_ahogado(self, color: Color) -> bool:
+        """Determina si el color indicado no está en jaque pero no tiene movimientos legales."""
+        return not self.esta_en_jaque(color) and not self._tiene_movimientos(color)
+
+    def sincronizar_bitboards(self):
+        """Reconstruye bitboards, caché de reyes y clave desde `casillas` tras una edición directa del diccionario.
+
+        Empieza un historial nuevo: las entradas de deshacer anteriores ya no
+        corresponden a la posición y se descartan.
+        """
+        self.bitboards = bb.Bitboards()
+        for (x, y), pieza in self.casillas.items():
+            if pieza:
+                self.bitboards.poner(bb.casilla(x, y), COLOR_BB[pieza.color], TIPO_BB[pieza.tipo])
+        self.reyes = [self.bitboards.casilla_rey(bb.BLANCO), self.bitboards.casilla_rey(bb.NEGRO)]
+        self.clave = zobrist.calcular_clave(
+            self.bitboards, self.turno == Color.NEGRO, self.enroques, self.al_paso
+        )
+        self.historial_claves = [self.clave]
+        self.pila_deshacer = []
+
     def inicializar_tablero(self):
         """Coloca piezas y peones en el tablero en su posición inicial estándar."""
         for i in range(8):
             self.casillas[(i, 1)] = Pieza(Color.BLANCO, TipoPieza.PEON)
             self.casillas[(i, 6)] = Pieza(Color.NEGRO, TipoPieza.PEON)
-            
+
         piezas_blancas = [
             (0, 0, Color.BLANCO, TipoPieza.TORRE),
             (1, 0, Color.BLANCO, TipoPieza.CABALLO),
@@ -122,15 +377,98 @@ class Tablero:
         ]
         peones_blancos = [(i, 1, Color.BLANCO, TipoPieza.PEON) for i in range(8)]
         piezas_blancas.extend(peones_blancos)
-        
+
         piezas_negras = [
             (i, 7, Color.NEGRO, tipo) for i, _, _, tipo in piezas_blancas[:8]
         ]
         peones_negros = [(i, 6, Color.NEGRO, TipoPieza.PEON) for i in range(8)]
         piezas_negras.extend(peones_negros)
-        
+
         for x, y, color, tipo in piezas_blancas + piezas_negras:
-            pieza = Pieza(color, tipo)
-            pieza.posicion = (x, y)
-            pieza.imagen = self.gestor_recursos.obtener_imagen(color, tipo)
-            self.casillas[(x, y)] = pieza
+            self.casillas[(x, y)] = self._crear_pieza(color, tipo, (x, y))
+        self.enroques = 15
+        self.al_paso = -1
+        self.sincronizar_bitboards()
+
+    def cargar_fen(self, fen: str):
+        """Sustituye la posición por la descrita en `fen`.
+
+        Lee colocación, turno, enroques, casilla al paso y contadores (los campos
+        ausentes toman su valor por defecto). Reinicia historial y pila de deshacer.
+        """
+        campos = fen.split()
+        filas = campos[0].split('/')
+        if len(filas) != 8:
+            raise ValueError(f"FEN inválido: {fen}")
+        self.casillas = Casillas()
+        for i, fila in enumerate(filas):
+            y = 7 - i
+            x = 0
+            for caracter in fila:
+                if caracter.isdigit():
+                    x += int(caracter)
+                    continue
+                tipo = FEN_TIPO.get(caracter.lower())
+                if tipo is None or x > 7:
+                    raise ValueError(f"FEN inválido: {fen}")
+                color = Color.BLANCO if caracter.isupper() else Color.NEGRO
+                pieza = self._crear_pieza(color, tipo, (x, y))
+                if tipo == TipoPieza.PEON and y != (1 if color == Color.BLANCO else 6):
+                    pieza.movimientos = 1
+                self.casillas[(x, y)] = pieza
+                x += 1
+            if x != 8:
+                raise ValueError(f"FEN inválido: {fen}")
+
+        self.turno = Color.NEGRO if len(campos) > 1 and campos[1] == 'b' else Color.BLANCO
+        self.enroques = 0
+        if len(campos) > 2:
+            for derecho, letra in ENROQUES_FEN:
+                if letra in campos[2]:
+                    self.enroques |= derecho
+        self.al_paso = -1
+        if len(campos) > 3 and campos[3] != '-':
+            self.al_paso = bb.casilla(ord(campos[3][0]) - ord('a'), int(campos[3][1]) - 1)
+        self.medio_movimientos = int(campos[4]) if len(campos) > 4 else 0
+        self.numero_jugada = int(campos[5]) if len(campos) > 5 else 1
+        self.historial_movimientos = []
+        self.sincronizar_bitboards()
+        if self.esta_en_jaque(self.turno):
+            self.estado = EstadoJuego.JAQUE_MATE if self.esta_en_jaque_mate(self.turno) else EstadoJuego.JAQUE
+        elif self.esta_ahogado(self.turno):
+            self.estado = EstadoJuego.EMPATE
+        else:
+            self.estado = EstadoJuego.JUGANDO
+
+    def a_fen(self) -> str:
+        """Devuelve la posición en FEN completo (enroques, al paso y contadores incluidos)."""
+        filas = []
+        for y in range(7, -1, -1):
+            fila = ""
+            vacias = 0
+            for x in range(8):
+                pieza = self.casillas.get((x, y))
+                if pieza is None:
+                    vacias += 1
+                    continue
+                if vacias:
+                    fila += str(vacias)
+                    vacias = 0
+                letra = TIPO_FEN[pieza.tipo]
+                fila += letra.upper() if pieza.color == Color.BLANCO else letra
+            if vacias:
+                fila += str(vacias)
+            filas.append(fila)
+        turno = "w" if self.turno == Color.BLANCO else "b"
+        enroques = "".join(letra for derecho, letra in ENROQUES_FEN if self.enroques & derecho) or "-"
+        if self.al_paso >= 0:
+            x, y = bb.coordenadas(self.al_paso)
+            al_paso = f"{chr(ord('a') + x)}{y + 1}"
+        else:
+            al_paso = "-"
+        return f"{'/'.join(filas)} {turno} {enroques} {al_paso} {self.medio_movimientos} {self.numero_jugada}"
+
+    def _crear_pieza(self, color: Color, tipo: TipoPieza, posicion: Tuple[int, int]) -> Pieza:
+        pieza = Pieza(color, tipo)
+        pieza.posicion = posicion
+        return pieza
@@ -0,0 +1,37 @@
+"""Claves Zobrist de 64 bits para identificar posiciones.
+
+Responsabilidades:
+- Proveer números aleatorios fijos por (color, tipo, casilla), turno, enroques y columna al paso
+- Calcular la clave completa de una posición en bitboards
+
+Las tablas se generan con una semilla fija, así que la misma posición produce
+la misma clave entre ejecuciones y procesos (apta para cachés persistentes).
+"""
+import random
+from typing import List
+
+from .bitboard import Bitboards, iterar_bits
+
+_generador = random.Random(0x41A3D8E2)
+
+# PIEZAS[color * 6 + tipo][casilla]
+PIEZAS: List[List[int]] = [[_generador.getrandbits(64) for _ in range(64)] for _ in range(12)]
+# Se aplica cuando mueven las negras
+TURNO_NEGRO = _generador.getrandbits(64)
+# ENROQUES[derechos]: una clave por combinación de los cuatro bits de enroque (0 para ninguno)
+ENROQUES: List[int] = [0] + [_generador.getrandbits(64) for _ in range(15)]
+# AL_PASO[columna]: columna de la casilla de captura al paso
+AL_PASO: List[int] = [_generador.getrandbits(64) for _ in range(8)]
+
+
+def calcular_clave(bitboards: Bitboards, negro_mueve: bool, enroques: int = 0, al_paso: int = -1) -> int:
+    """Calcula desde cero la clave de la posición."""
+    clave = TURNO_NEGRO if negro_mueve else 0
+    clave ^= ENROQUES[enroques]
+    if al_paso >= 0:
+        clave ^= AL_PASO[al_paso & 7]
+    for indice, mascara in enumerate(bitboards.piezas):
+        tabla = PIEZAS[indice]
+        for sq in iterar_bits(mascara):
+            clave ^= tabla[sq]
+    return clave
@@ -0,0 +1,303 @@
+"""Análisis por lotes de posiciones con motores UCI.
+
+Uso:
+    python -m analizar partidas.pgn --salida analisis.jsonl
+    python -m analizar posiciones.epd --procesos 8 --profundidad 18 --formato csv --salida analisis.csv
+    python -m analizar partidas.pgn --tiempo-ms 200 --motor /ruta/a/stockfish
+    python -m analizar partidas.pgn --motor lc0
+    python -m analizar partidas.pgn --perfil dificil
+    python -m analizar partidas.pgn --profundidad 18 --cache cache_analisis.sqlite3
+
+Responsabilidades:
+- Leer PGN (todas las posiciones de la línea principal) o FEN/EPD (una por línea)
+  como flujo, sin cargar el fichero entero
+- Repartir las posiciones entre N procesos de motor (uno por núcleo por defecto)
+- Escribir cada resultado en JSONL o CSV en cuanto termina (jugada, evaluación,
+  PV, profundidad, nodos); con MultiPV, una fila por línea; si el análisis de
+  una posición falla, una fila con el campo `error`
+- Con `--cache`, reutilizar (y guardar) la línea principal de las posiciones ya
+  analizadas con el mismo motor, opciones y al menos el mismo presupuesto
+
+La memoria es constante: entre la lectura y los motores hay una cola acotada,
+y los resultados no se acumulan (se escriben en el orden en que terminan; el
+campo `id` identifica la posición de origen).
+"""
+import argparse
+import csv
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import chess
+    import chess.engine
+    import chess.pgn
+except Exception:
+    chess = None
+
+from reglas import CacheAnalisis, LineaAnalisis, MotorUCI, PERFILES_MOTOR, resolver_motor
+
+CAMPOS = ("id", "fen", "multipv", "jugada", "puntuacion_cp", "mate", "pv", "profundidad", "nodos", "error")
+
+# Marca de fin para los hilos de trabajo
+_FIN = None
+
+
+def leer_posiciones(ruta: str) -> Iterator[Tuple[str, str]]:
+    """Genera (id, fen) desde un PGN o un fichero FEN/EPD, de forma perezosa.
+
+    En PGN el id es `partida:jugada` (medias jugadas desde 0); en FEN/EPD, el
+    número de línea.
+    """
+    with open(ruta, encoding="utf-8", errors="replace") as f:
+        if ruta.lower().endswith(".pgn"):
+            numero = 0
+            while True:
+                partida = chess.pgn.read_game(f)
+                if partida is None:
+                    break
+                numero += 1
+                board = partida.board()
+                yield f"{numero}:0", board.fen()
+                for ply, move in enumerate(partida.mainline_moves(), 1):
+                    board.push(move)
+                    yield f"{numero}:{ply}", board.fen()
+            return
+        for numero, linea in enumerate(f, 1):
+            linea = linea.strip()
+            if not linea or linea.startswith("#"):
+                continue
+            campos = linea.split()
+            try:
+                if len(campos) == 6 and campos[4].isdigit() and campos[5].isdigit():
+                    board = chess.Board(linea)
+                else:
+                    # EPD: cuatro campos de posición seguidos de operaciones opcionales
+                    board, _ = chess.Board.from_epd(linea)
+            except ValueError as e:
+                print(f"Línea {numero} ignorada: {e}", file=sys.stderr)
+                continue
+            yield str(numero), board.fen()
+
+
+def _resultado(id_posicion: str, fen: str, linea: Optional[LineaAnalisis],
+               error: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": id_posicion,
+        "fen": fen,
+        "multipv": linea.multipv if linea else None,
+        "jugada": linea.jugada if linea else None,
+        "puntuacion_cp": linea.puntuacion_cp if linea else None,
+        "mate": linea.mate if linea else None,
+        "pv": " ".join(linea.pv) if linea else "",
+        "profundidad": linea.profundidad if linea else None,
+        "nodos": linea.nodos if linea else None,
+        "error": error,
+    }
+
+
+def _analizar_posicion(motor: MotorUCI, limites: Dict[str, Optional[int]], cache: Optional[CacheAnalisis],
+                       opciones_cache: Dict[str, Any], id_posicion: str, fen: str):
+    """Filas de resultado de una posición (desde la caché o el motor)."""
+    linea = None
+    if cache is not None:
+        linea = cache.obtener_linea(fen, motor.ruta_motor, opciones_cache,
+                                    profundidad=limites.get("profundidad"), tiempo_ms=limites.get("tiempo_ms"))
+    if linea is not None and linea.puntuacion_cp is None and linea.mate is None:
+        # Entrada de `sugerir_movimiento` sin evaluación: se analiza de nuevo
+        linea = None
+    if linea is not None:
+        return [_resultado(id_posicion, fen, linea)]
+    lineas = motor.analizar(fen, **limites)
+    if lineas and cache is not None and lineas[0].jugada:
+        cache.guardar(fen, motor.ruta_motor, lineas[0].jugada, opciones_cache,
+                      profundidad=lineas[0].profundidad, tiempo_ms=limites.get("tiempo_ms"), linea=lineas[0])
+    if not lineas:
+        print(f"Sin análisis para {id_posicion}", file=sys.stderr)
+        return [_resultado(id_posicion, fen, None)]
+    return [_resultado(id_posicion, fen, linea) for linea in lineas]
+
+
+def _trabajar(motor: MotorUCI, limites: Dict[str, Optional[int]], entrada: "queue.Queue", salida: "queue.Queue",
+              cache: Optional[CacheAnalisis] = None):
+    # Cada hilo tiene su propio proceso de motor; el trabajo de CPU lo hace el motor.
+    # La caché guarda solo la línea principal: con MultiPV no se usa
+    if limites.get("multipv", 1) != 1:
+        cache = None
+    # Como en `sugerir_movimiento`, el límite de nodos forma parte de la clave
+    opciones_cache = dict(motor.opciones, nodos=limites["nodos"]) if limites.get("nodos") else motor.opciones
+    try:
+        while True:
+            tarea = entrada.get()
+            if tarea is _FIN:
+                return
+            id_posicion, fen = tarea
+            try:
+                resultados = _analizar_posicion(motor, limites, cache, opciones_cache, id_posicion, fen)
+            except Exception as e:
+                # Un fallo (p. ej. el motor cae a mitad) deja una fila de error y el hilo sigue
+                print(f"Error al analizar {id_posicion}: {e}", file=sys.stderr)
+                resultados = [_resultado(id_posicion, fen, None, error=str(e) or type(e).__name__)]
+            for resultado in resultados:
+                salida.put(resultado)
+    finally:
+        # Siempre: el bucle principal espera un _FIN por hilo
+        salida.put(_FIN)
+
+
+class _Escritor:
+    """Escribe resultados en JSONL o CSV, uno por línea y volcando en cada escritura."""
+    def __init__(self, destino, formato: str):
+        self.destino = destino
+        self.formato = formato
+        self._csv = None
+        if formato == "csv":
+            self._csv = csv.DictWriter(destino, fieldnames=CAMPOS)
+            self._csv.writeheader()
+
+    def escribir(self, resultado: Dict[str, Any]):
+        if self._csv is not None:
+            self._csv.writerow(resultado)
+        else:
+            self.destino.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        self.destino.flush()
+
+
+def analizar(rutas, ruta_motor: str, procesos: int, limites: Dict[str, Optional[int]], destino, formato: str = "jsonl",
+             opciones: Optional[Dict[str, Any]] = None, cache: Optional[CacheAnalisis] = None) -> int:
+    """Analiza todas las posiciones de `rutas` con `procesos` motores; devuelve cuántas se escribieron.
+
+    `limites` son los argumentos de `MotorUCI.analizar` (tiempo_ms, profundidad, nodos, multipv).
+    Con multipv > 1 se escribe una fila por línea y la cuenta es de filas. Con
+    `cache` (y una sola línea) las posiciones ya analizadas no pasan por el motor.
+    """
+    motores = []
+    for _ in range(procesos):
+        motor = MotorUCI(ruta_motor, opciones=opciones)
+        if not motor.disponible():
+            break
+        motores.append(motor)
+    if not motores:
+        print("El motor UCI no está disponible. Verifica la ruta y permisos del binario.", file=sys.stderr)
+        return 0
+
+    # Cola acotada: la lectura espera a los motores en vez de llenar la memoria
+    entrada: "queue.Queue" = queue.Queue(maxsize=2 * len(motores))
+    salida: "queue.Queue" = queue.Queue()
+    hilos = [
+        threading.Thread(target=_trabajar, args=(motor, limites, entrada, salida, cache), daemon=True)
+        for motor in motores
+    ]
+    for hilo in hilos:
+        hilo.start()
+
+    def leer():
+        try:
+            for ruta in rutas:
+                for tarea in leer_posiciones(ruta):
+                    entrada.put(tarea)
+        except OSError as e:
+            print(f"No se pudo leer la entrada: {e}", file=sys.stderr)
+        finally:
+            for _ in hilos:
+                entrada.put(_FIN)
+
+    lector = threading.Thread(target=leer, daemon=True)
+    lector.start()
+
+    escritor = _Escritor(destino, formato)
+    escritos = 0
+    activos = len(hilos)
+    try:
+        while activos:
+            resultado = salida.get()
+            if resultado is _FIN:
+                activos -= 1
+                continue
+            escritor.escribir(resultado)
+            escritos += 1
+    finally:
+        for motor in motores:
+            motor.cerrar()
+    return escritos
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Análisis por lotes de posiciones PGN/FEN/EPD con motores UCI")
+    parser.add_argument("entradas", nargs="+", help="ficheros .pgn, o FEN/EPD con una posición por línea")
+    parser.add_argument("--motor", default=None, help="ruta del binario UCI o nombre del registro de motores (por defecto, stockfish)")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1,
+                        help="número de procesos de motor en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--tiempo-ms", type=int, default=None, help="tiempo por posición en ms")
+    parser.add_argument("--profundidad", type=int, default=None, help="profundidad por posición")
+    parser.add_argument("--nodos", type=int, default=None, help="nodos por posición")
+    parser.add_argument("--perfil", choices=sorted(PERFILES_MOTOR), default=None,
+                        help="perfil de motor (opciones y presupuesto); los límites explícitos tienen prioridad")
+    parser.add_argument("--hash", type=int, default=None, help="tabla hash por motor, en MB")
+    parser.add_argument("--cache", default=None,
+                        help="fichero SQLite de la caché de análisis (p. ej. cache_analisis.sqlite3 del juego)")
+    parser.add_argument("--salida", default="-", help="fichero de resultados ('-' para la salida estándar)")
+    parser.add_argument("--formato", choices=("jsonl", "csv"), default=None,
+                        help="formato de salida (por defecto, según la extensión de --salida)")
+    args = parser.parse_args(argv)
+
+    if chess is None:
+        print("python-chess no está instalado; no se puede analizar.", file=sys.stderr)
+        return 1
+    if args.motor and os.path.isfile(args.motor):
+        ruta_motor = args.motor
+    else:
+        ruta_motor = resolver_motor(args.motor or "stockfish")
+    if not ruta_motor:
+        print("No se encontró el binario del motor UCI.", file=sys.stderr)
+        return 1
+    perfil = PERFILES_MOTOR[args.perfil] if args.perfil else None
+    if args.tiempo_ms is None and args.profundidad is None and args.nodos is None:
+        if perfil is not None:
+            args.tiempo_ms, args.profundidad, args.nodos = perfil.tiempo_ms, perfil.profundidad, perfil.nodos
+        else:
+            args.tiempo_ms = 500
+    limites = {"tiempo_ms": args.tiempo_ms, "profundidad": args.profundidad, "nodos": args.nodos}
+    if perfil is not None:
+        limites["multipv"] = perfil.multipv
+    formato = args.formato or ("csv" if args.salida.lower().endswith(".csv") else "jsonl")
+    # Un hilo de búsqueda por proceso: el paralelismo lo dan los procesos
+    opciones: Dict[str, Any] = dict(perfil.opciones) if perfil else {}
+    opciones["Threads"] = 1
+    if args.hash:
+        opciones["Hash"] = args.hash
+
+    cache = None
+    if args.cache:
+        try:
+            cache = CacheAnalisis(args.cache)
+        except sqlite3.Error as e:
+            print(f"No se pudo abrir la caché de análisis {args.cache}: {e}", file=sys.stderr)
+
+    inicio = time.perf_counter()
+    try:
+        if args.salida == "-":
+            escritos = analizar(args.entradas, ruta_motor, max(1, args.procesos), limites, sys.stdout, formato,
+                                opciones, cache)
+        else:
+            with open(args.salida, "w", encoding="utf-8", newline="") as destino:
+                escritos = analizar(args.entradas, ruta_motor, max(1, args.procesos), limites, destino, formato,
+                                    opciones, cache)
+    finally:
+        if cache is not None:
+            cache.cerrar()
+    segundos = time.perf_counter() - inicio
+    mensaje = f"{escritos} líneas escritas en {segundos:.1f} s"
+    if cache is not None:
+        mensaje += f" (caché: {cache.aciertos} aciertos, {cache.fallos} fallos)"
+    print(mensaje, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,7 +11,7 @@ import json
 import threading
 import time
 from typing import Optional, Tuple, Callable, List, Dict
-from modelos import Color
+from modelos import Color, TipoPieza
 
 # Constantes para descubrimiento automático
 PUERTO_BROADCAST = 8888  # Puerto UDP para anuncios de servidor
@@ -135,16 +135,19 @@ class ServidorAjedrez:
             if datos.get('tipo') == 'movimiento' and self.callback_movimiento:
                 origen = tuple(datos['origen'])
                 destino = tuple(datos['destino'])
-                self.callback_movimiento(origen, destino)
+                promocion = TipoPieza(datos['promocion']) if datos.get('promocion') else None
+                self.callback_movimiento(origen, destino, promocion)
         except Exception as e:
             print(f"Error al procesar mensaje: {e}")
     
-    def enviar_movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int]) -> bool:
+    def enviar_movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int],
+                          promocion: Optional[TipoPieza] = None) -> bool:
         """Envía un movimiento al cliente conectado.
         
         Args:
             origen: Coordenadas (x, y) de la casilla de origen
             destino: Coordenadas (x, y) de la casilla de destino
+            promocion: Pieza elegida al coronar (None: reina)
             
         Returns:
             True si se envió correctamente, False en caso de error
@@ -153,11 +156,14 @@ class ServidorAjedrez:
             return False
         
         try:
-            mensaje = json.dumps({
+            datos = {
                 'tipo': 'movimiento',
                 'origen': list(origen),
                 'destino': list(destino)
-            }) + '\n'
+            }
+            if promocion is not None:
+                datos['promocion'] = promocion.value
+            mensaje = json.dumps(datos) + '\n'
             self.socket_cliente.sendall(mensaje.encode('utf-8'))
             return True
         except Exception as e:
@@ -169,7 +175,7 @@ class ServidorAjedrez:
         """Establece la función a llamar cuando se recibe un movimiento.
         
         Args:
-            callback: Función que recibe (origen, destino) como parámetros
+            callback: Función que recibe (origen, destino, promocion) como parámetros
         """
         self.callback_movimiento = callback
     
@@ -280,16 +286,19 @@ class ClienteAjedrez:
             if datos.get('tipo') == 'movimiento' and self.callback_movimiento:
                 origen = tuple(datos['origen'])
                 destino = tuple(datos['destino'])
-                self.callback_movimiento(origen, destino)
+                promocion = TipoPieza(datos['promocion']) if datos.get('promocion') else None
+                self.callback_movimiento(origen, destino, promocion)
         except Exception as e:
             print(f"Error al procesar mensaje: {e}")
     
-    def enviar_movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int]) -> bool:
+    def enviar_movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int],
+                          promocion: Optional[TipoPieza] = None) -> bool:
         """Envía un movimiento al servidor.
         
         Args:
             origen: Coordenadas (x, y) de la casilla de origen
             destino: Coordenadas (x, y) de la casilla de destino
+            promocion: Pieza elegida al coronar (None: reina)
             
         Returns:
             True si se envió correctamente, False en caso de error
@@ -298,11 +307,14 @@ class ClienteAjedrez:
             return False
         
         try:
-            mensaje = json.dumps({
+            datos = {
                 'tipo': 'movimiento',
                 'origen': list(origen),
                 'destino': list(destino)
-            }) + '\n'
+            }
+            if promocion is not None:
+                datos['promocion'] = promocion.value
+            mensaje = json.dumps(datos) + '\n'
             self.socket_cliente.sendall(mensaje.encode('utf-8'))
             return True
         except Exception as e:
@@ -314,7 +326,7 @@ class ClienteAjedrez:
         """Establece la función a llamar cuando se recibe un movimiento.
         
         Args:
-            callback: Función que recibe (origen, destino) como parámetros
+            callback: Función que recibe (origen, destino, promocion) como parámetros
         """
         self.callback_movimiento = callback
     
@@ -11,8 +11,8 @@ import socket
 import threading
 from ui import Menu, InterfazUsuario
 from lan import ServidorAjedrez, ClienteAjedrez, DescubridorServidores, PUERTO_JUEGO
-from modelos import Color
-from reglas import sugerir_movimiento
+from modelos import Color, TipoPieza
+from reglas import sugerir_movimiento_async, POOL_MOTORES, MOTOR_POR_DEFECTO
 from ajedrez_sombras import juego_sombras
 
 def main():
@@ -82,6 +82,7 @@ def juego_local():
     """Ejecuta una partida local (Jugador vs Jugador)."""
     # Crear la interfaz de usuario y preparar estado de selección
     interfaz = InterfazUsuario()
+    interfaz.permitir_deshacer = True  # Retroceso deshace la última jugada
     seleccionado = None
     clock = pygame.time.Clock()
     
@@ -102,7 +103,7 @@ def juego_local():
                     interfaz.tablero.casillas[click].color == interfaz.tablero.turno):
                     seleccionado = click
             else:
-                if interfaz.tablero.realizar_movimiento(seleccionado, click):
+                if interfaz.realizar_movimiento(seleccionado, click):
                     # Reproducir sonido al mover la ficha (si está disponible)
                     interfaz.reproducir_sonido_movimiento()
                     seleccionado = None
@@ -120,7 +121,10 @@ def juego_local():
 
 
 def _lan_a_coords(lan: str):
-    """Convierte un movimiento LAN (e2e4) a coordenadas (x, y)."""
+    """Convierte un movimiento LAN (e2e4, e7e8q) a (origen, destino, promocion).
+
+    `promocion` es el TipoPieza indicado por el quinto carácter, o None.
+    """
     if not lan or len(lan) < 4:
         return None
     a, r1, b, r2 = lan[0], lan[1], lan[2], lan[3]
@@ -130,46 +134,75 @@ def _lan_a_coords(lan: str):
         # El tablero interno usa y=0 arriba; rank 1 corresponde a y=0.
         y = r - 1
         return (x, y)
-    return (sq_to_xy(a, r1), sq_to_xy(b, r2))
+    promociones = {
+        'q': TipoPieza.REINA,
+        'r': TipoPieza.TORRE,
+        'b': TipoPieza.ALFIL,
+        'n': TipoPieza.CABALLO,
+    }
+    promocion = promociones.get(lan[4].lower()) if len(lan) > 4 else None
+    return (sq_to_xy(a, r1), sq_to_xy(b, r2), promocion)
+
 
+def juego_vs_maquina(motor: str = MOTOR_POR_DEFECTO):
+    """Ejecuta una partida contra Stockfish local o el motor interno (jugador blancas, IA negras).
 
-def juego_vs_maquina():
-    """Ejecuta una partida contra Stockfish local (jugador blancas, IA negras)."""
+    `motor` es un nombre del registro de motores de reglas (stockfish, lc0, interno...).
+    """
     interfaz = InterfazUsuario()
     seleccionado = None
     clock = pygame.time.Clock()
+    # Future de la búsqueda del motor en curso (None si no está pensando)
+    busqueda = None
+    # Se activa al cerrar: la búsqueda en curso no empieza a ponderar después
+    cancelacion = threading.Event()
     
     while True:
         dt = clock.tick(60) / 1000.0
         interfaz.actualizar_tiempos(dt)
         
-        # Si es turno de la IA (negras), pedir jugada al motor local
+        # Si es turno de la IA (negras), lanzar la búsqueda en segundo plano y
+        # consultarla en cada frame: la ventana sigue respondiendo mientras piensa
         if interfaz.tablero.turno == Color.NEGRO:
-            # Mostrar estado mientras el motor calcula (bloqueante por diseño)
-            interfaz.mensaje_estado = "Pensando..."
-            interfaz.dibujar_tablero(seleccionado)
-            pygame.display.flip()
-            
-            # El motor se detecta automáticamente (PATH o carpeta stockfish/)
-            lan = sugerir_movimiento(interfaz.tablero.casillas, interfaz.tablero.turno, motor="stockfish", nivel="medio")
-            coords = _lan_a_coords(lan) if lan else None
-            if coords:
-                origen, destino = coords
-                if interfaz.tablero.realizar_movimiento(origen, destino):
-                    interfaz.reproducir_sonido_movimiento()
+            if busqueda is None:
+                interfaz.mensaje_estado = "Pensando..."
+                # El motor se detecta automáticamente (PATH o carpeta stockfish/) y se reutiliza
+                # entre jugadas desde el pool de reglas (no se arranca un proceso por jugada);
+                # sin binario, juega el motor interno en Python.
+                # Se envía el FEN completo (enroques, al paso) para que la jugada sea legal aquí
+                busqueda = sugerir_movimiento_async(interfaz.tablero.casillas, interfaz.tablero.turno,
+                                                    motor=motor, nivel="medio",
+                                                    fen=interfaz.tablero.a_fen(), cancelado=cancelacion)
+            elif busqueda.done():
+                lan = busqueda.result()
+                busqueda = None
+                coords = _lan_a_coords(lan) if lan else None
+                if coords:
+                    origen, destino, promocion = coords
+                    if interfaz.realizar_movimiento(origen, destino, promocion):
+                        interfaz.reproducir_sonido_movimiento()
+                    else:
+                        # Evitar bucle infinito si el movimiento del motor no encaja en el tablero interno
+                        print("Movimiento del motor inválido para el tablero actual")
+                        break
                 else:
-                    # Evitar bucle infinito si el movimiento del motor no encaja en el tablero interno
-                    print("Movimiento de Stockfish inválido para el tablero actual")
+                    print("No se pudo obtener jugada del motor")
                     break
-            else:
-                print("No se pudo obtener jugada de Stockfish")
-                break
-            
-            interfaz.mensaje_estado = None
+                
+                interfaz.mensaje_estado = None
         
-        # Manejo de eventos: clics y cierre de ventana
+        # Manejo de eventos: clics y cierre de ventana (también durante la búsqueda)
         continuar, click = interfaz.manejar_eventos()
         if not continuar:
+            cancelacion.set()
+            if busqueda is not None and not busqueda.cancel():
+                # Ya estaba buscando: esperar a que suelte el motor para poder detener el ponder
+                try:
+                    busqueda.result()
+                except Exception:
+                    pass
+            # El motor deja de ponderar la jugada esperada (el proceso sigue en el pool)
+            POOL_MOTORES.detener_ponder()
             break
         
         # Turno del jugador (blancas)
@@ -180,7 +213,7 @@ def juego_vs_maquina():
                     interfaz.tablero.casillas[click].color == interfaz.tablero.turno):
                     seleccionado = click
             else:
-                if interfaz.tablero.realizar_movimiento(seleccionado, click):
+                if interfaz.realizar_movimiento(seleccionado, click):
                     interfaz.reproducir_sonido_movimiento()
                     seleccionado = None
                 else:
@@ -266,12 +299,14 @@ def juego_lan_servidor():
         return
     
     # Variable para almacenar movimientos del oponente
-    movimiento_pendiente = {'origen': None, 'destino': None}
+    movimiento_pendiente = {'origen': None, 'destino': None, 'promocion': None}
     
-    def recibir_movimiento_oponente(origen, destino):
+    def recibir_movimiento_oponente(origen, destino, promocion=None):
         """Callback cuando se recibe un movimiento del cliente."""
-        movimiento_pendiente['origen'] = origen
+        # `origen` va al final: el bucle lo toma como señal de que la jugada está completa
+        movimiento_pendiente['promocion'] = promocion
         movimiento_pendiente['destino'] = destino
+        movimiento_pendiente['origen'] = origen
     
     servidor.establecer_callback_movimiento(recibir_movimiento_oponente)
     
@@ -288,11 +323,13 @@ def juego_lan_servidor():
         if movimiento_pendiente['origen'] is not None:
             origen = movimiento_pendiente['origen']
             destino = movimiento_pendiente['destino']
+            promocion = movimiento_pendiente['promocion']
             movimiento_pendiente['origen'] = None
             movimiento_pendiente['destino'] = None
+            movimiento_pendiente['promocion'] = None
             
             # Aplicar movimiento del oponente (negras)
-            if interfaz.tablero.realizar_movimiento(origen, destino):
+            if interfaz.realizar_movimiento(origen, destino, promocion):
                 interfaz.reproducir_sonido_movimiento()
         
         # Manejo de eventos locales
@@ -308,7 +345,7 @@ def juego_lan_servidor():
                     interfaz.tablero.casillas[click].color == Color.BLANCO):
                     seleccionado = click
             else:
-                if interfaz.tablero.realizar_movimiento(seleccionado, click):
+                if interfaz.realizar_movimiento(seleccionado, click):
                     # Enviar el movimiento al cliente
                     servidor.enviar_movimiento(seleccionado, click)
                     interfaz.reproducir_sonido_movimiento()
@@ -380,12 +417,14 @@ def juego_lan_cliente():
     interfaz = InterfazUsuario()
     
     # Variable para almacenar movimientos del oponente
-    movimiento_pendiente = {'origen': None, 'destino': None}
+    movimiento_pendiente = {'origen': None, 'destino': None, 'promocion': None}
     
-    def recibir_movimiento_oponente(origen, destino):
+    def recibir_movimiento_oponente(origen, destino, promocion=None):
         """Callback cuando se recibe un movimiento del servidor."""
-        movimiento_pendiente['origen'] = origen
+        # `origen` va al final: el bucle lo toma como señal de que la jugada está completa
+        movimiento_pendiente['promocion'] = promocion
         movimiento_pendiente['destino'] = destino
+        movimiento_pendiente['origen'] = origen
     
     cliente.establecer_callback_movimiento(recibir_movimiento_oponente)
     
@@ -401,11 +440,13 @@ def juego_lan_cliente():
         if movimiento_pendiente['origen'] is not None:
             origen = movimiento_pendiente['origen']
             destino = movimiento_pendiente['destino']
+            promocion = movimiento_pendiente['promocion']
             movimiento_pendiente['origen'] = None
             movimiento_pendiente['destino'] = None
+            movimiento_pendiente['promocion'] = None
             
             # Aplicar movimiento del oponente (blancas)
-            if interfaz.tablero.realizar_movimiento(origen, destino):
+            if interfaz.realizar_movimiento(origen, destino, promocion):
                 interfaz.reproducir_sonido_movimiento()
         
         # Manejo de eventos locales
@@ -421,7 +462,7 @@ def juego_lan_cliente():
                     interfaz.tablero.casillas[click].color == Color.NEGRO):
                     seleccionado = click
             else:
-                if interfaz.tablero.realizar_movimiento(seleccionado, click):
+                if interfaz.realizar_movimiento(seleccionado, click):
                     # Enviar el movimiento al servidor
                     cliente.enviar_movimiento(seleccionado, click)
                     interfaz.reproducir_sonido_movimiento()
@@ -2,10 +2,16 @@
 
 - Color, TipoPieza, EstadoJuego: enumeraciones del juego
 - GestorRecursos: carga y entrega imágenes de piezas con tolerancia a faltantes
+
+pygame se importa solo al crear un GestorRecursos: las enumeraciones (y con
+ellas el núcleo de reglas) funcionan sin pygame ni pantalla.
 """
 from enum import Enum
 import os
-import pygame
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pygame
 
 class Color(Enum):
     BLANCO = "blanco"
@@ -37,6 +43,7 @@ class GestorRecursos:
         
     def cargar_imagenes(self):
         """Intentar cargar imágenes; si faltan, crear superficies de color como placeholder."""
+        import pygame
         self.directorio_imagenes = os.path.join(self.directorio_actual, "images")
         if not os.path.exists(self.directorio_imagenes):
             os.makedirs(self.directorio_imagenes)
@@ -78,6 +85,7 @@ class GestorRecursos:
         """Carga sonidos del proyecto; si faltan, continúa sin bloquear la ejecución.
         - Se espera 'sounds/ficha.mp3' para reproducir en menú y movimientos.
         """
+        import pygame
         try:
             # Inicializar mixer de Pygame (puede fallar si no hay dispositivo de audio disponible)
             if not pygame.mixer.get_init():
@@ -101,8 +109,9 @@ class GestorRecursos:
                 print(f"Advertencia: No se pudo cargar sonido {archivo} en {ruta}.")
                 self.sonidos[nombre] = None
                 
-    def obtener_imagen(self, color: Color, tipo: TipoPieza) -> pygame.Surface:
+    def obtener_imagen(self, color: Color, tipo: TipoPieza) -> "pygame.Surface":
         """Devuelve la imagen correspondiente a color/tipo; retorna un placeholder si no existe."""
+        import pygame
         nombre_imagen = f"{tipo.value.upper()}_{'BLANCO' if color == Color.BLANCO else 'NEGRO'}"
         if nombre_imagen not in self.imagenes:
             print(f"Advertencia: No se encontró la imagen {nombre_imagen}")
@@ -2,13 +2,33 @@
 
 Responsabilidades:
 - Conversión entre el modelo Tablero y FEN (python-chess)
+- Validación con un `chess.Board` sincronizado jugada a jugada (`Reglas`)
 - Aplicación de movimientos en formato LAN (e2e4)
 - Wrapper de motores UCI (Stockfish, LCZero) para obtener mejores jugadas
+  y análisis estructurado (MultiPV, límites de tiempo/profundidad/nodos/mate)
+- Pool de motores persistentes (por ruta y opciones) con chequeo de salud,
+  reinicio tras caída y cierre por inactividad
+- Búsqueda en segundo plano (`Future`) para no bloquear el bucle de pygame
+- Ponder: el motor analiza la respuesta esperada mientras piensa el rival
+- Caché persistente de análisis (SQLite) por posición, motor y opciones
+- Perfiles de motor por nivel (Threads, Hash, Skill Level/UCI_Elo, MultiPV,
+  presupuesto), cargables desde `perfiles_motor.json`
+- Registro de motores (Stockfish, Lc0, interno) configurable con `motores.json`
+  y variables de entorno; la ruta de cada binario se resuelve una vez y se
+  guarda, con su `id` y opciones UCI, en `motores_manifiesto.json`
+- Motor interno en Python puro (`ajedrez_clasico.motor`) cuando no hay binario UCI
 """
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, Any, List, Iterator, NamedTuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import atexit
+import json
 import os
+import sqlite3
 import sys
 import subprocess
+import threading
+import time
 
 try:
     import chess
@@ -19,6 +39,7 @@ except Exception:
 
 from modelos import Color, TipoPieza
 from ajedrez_clasico import Pieza
+from ajedrez_clasico.motor import MotorInterno
 
 def tablero_a_fen(casillas: Dict[Tuple[int, int], Optional[Pieza]], turno: Color) -> str:
     """Convierte el diccionario de casillas a FEN estándar.
@@ -54,8 +75,18 @@ def tablero_a_fen(casillas: Dict[Tuple[int, int], Optional[Pieza]], turno: Color
         filas.append(fila_fen)
     fen_pos = "/".join(filas)
     turno_char = "w" if turno == Color.BLANCO else "b"
-    # Sin enroques, sin peón al paso, contadores en 0
-    return f"{fen_pos} {turno_char} - - 0 1"
+    # Enroques deducidos de rey y torres sin mover; sin peón al paso, contadores en 0.
+    # Cuando se dispone del Tablero, `Tablero.a_fen()` da el FEN exacto.
+    enroques = ""
+    for color, fila, letras in ((Color.BLANCO, 0, "KQ"), (Color.NEGRO, 7, "kq")):
+        rey = casillas.get((4, fila))
+        if not rey or rey.tipo != TipoPieza.REY or rey.color != color or rey.movimientos:
+            continue
+        for x, letra in ((7, letras[0]), (0, letras[1])):
+            torre = casillas.get((x, fila))
+            if torre and torre.tipo == TipoPieza.TORRE and torre.color == color and not torre.movimientos:
+                enroques += letra
+    return f"{fen_pos} {turno_char} {enroques or '-'} - 0 1"
 
 def aplicar_movimiento_lan(casillas: Dict[Tuple[int, int], Optional[Pieza]], lan: str) -> bool:
     """Aplica un movimiento tipo 'e2e4' en el diccionario de casillas."""
@@ -79,90 +110,743 @@ def aplicar_movimiento_lan(casillas: Dict[Tuple[int, int], Optional[Pieza]], lan
     pieza.movimientos += 1
     return True
 
+class LineaAnalisis(NamedTuple):
+    """Una línea (MultiPV) del análisis del motor; la puntuación es desde el bando que mueve."""
+    multipv: int
+    jugada: Optional[str]
+    puntuacion_cp: Optional[int]
+    mate: Optional[int]
+    pv: List[str]
+    profundidad: Optional[int]
+    seldepth: Optional[int]
+    nodos: Optional[int]
+    nps: Optional[int]
+
+
+def _linea_analisis(info: Dict[str, Any]) -> LineaAnalisis:
+    pv = [move.uci() for move in info.get("pv") or []]
+    puntuacion = info.get("score")
+    cp = mate = None
+    if puntuacion is not None:
+        relativa = puntuacion.relative
+        cp = relativa.score()
+        mate = relativa.mate()
+    return LineaAnalisis(
+        multipv=info.get("multipv", 1),
+        jugada=pv[0] if pv else None,
+        puntuacion_cp=cp,
+        mate=mate,
+        pv=pv,
+        profundidad=info.get("depth"),
+        seldepth=info.get("seldepth"),
+        nodos=info.get("nodes"),
+        nps=info.get("nps"),
+    )
+
+
+# Información pedida al jugar: la de `INFO_BASIC` más puntuación y PV (para la caché)
+_INFO_LINEA = (chess.engine.INFO_BASIC | chess.engine.INFO_SCORE | chess.engine.INFO_PV) if chess else None
+
+
 class MotorUCI:
     """Wrapper simple para motores UCI usando python-chess."""
-    def __init__(self, ruta_motor: str, tiempo_ms: int = 1000):
+    def __init__(self, ruta_motor: str, tiempo_ms: int = 1000, opciones: Optional[Dict[str, Any]] = None):
         self.ruta_motor = ruta_motor
         self.tiempo_ms = tiempo_ms
+        self.opciones = dict(opciones or {})
+        # Profundidad alcanzada en la última búsqueda (None si el motor no la informó)
+        self.ultima_profundidad: Optional[int] = None
+        # Línea principal (puntuación, PV, profundidad) de la última búsqueda
+        self.ultima_linea: Optional[LineaAnalisis] = None
+        # Respuesta del rival que el motor espera tras su última jugada (LAN)
+        self.ultima_ponder: Optional[str] = None
+        # Ponder en curso: (FEN normalizado esperado, análisis de python-chess, inicio)
+        self._ponder: Optional[Tuple[str, Any, float]] = None
         self.proc = None
         self.engine = None
-        if chess is not None:
-            try:
-                self.engine = chess.engine.SimpleEngine.popen_uci(ruta_motor)
-            except Exception:
-                self.engine = None
+        self.iniciar()
+
+    def iniciar(self):
+        """Arranca el proceso del motor y aplica `opciones`; deja `engine` en None si falla."""
+        self.engine = None
+        if chess is None:
+            return
+        try:
+            self.engine = chess.engine.SimpleEngine.popen_uci(self.ruta_motor)
+            # Las opciones que el motor no declara se ignoran (no todos tienen Threads, Hash...)
+            opciones = {k: v for k, v in self.opciones.items() if k in self.engine.options}
+            if opciones:
+                self.engine.configure(opciones)
+        except Exception as e:
+            print(f"No se pudo iniciar el motor {self.ruta_motor}: {e}")
+            self.cerrar()
     
+    def configurar(self, opciones: Dict[str, Any]):
+        """Cambia de perfil sin reiniciar el proceso.
+
+        Aplica solo las opciones que cambian; las que fijaba el perfil anterior
+        y no fija el nuevo vuelven a su valor por defecto.
+        """
+        if not self.engine:
+            self.opciones = dict(opciones)
+            return
+        cambios = {}
+        for nombre in self.opciones:
+            if nombre not in opciones and nombre in self.engine.options:
+                cambios[nombre] = self.engine.options[nombre].default
+        for nombre, valor in opciones.items():
+            if nombre in self.engine.options and self.opciones.get(nombre) != valor:
+                cambios[nombre] = valor
+        self.opciones = dict(opciones)
+        if cambios:
+            # El ponder se hizo con otras opciones: no vale para este perfil
+            self.detener_ponder()
+            try:
+                self.engine.configure(cambios)
+            except Exception as e:
+                print(f"No se pudieron aplicar las opciones del motor {cambios}: {e}")
+
     def disponible(self) -> bool:
         return self.engine is not None
+
+    def vivo(self) -> bool:
+        """Chequeo de salud: el proceso responde a `isready`."""
+        if not self.engine:
+            return False
+        try:
+            self.engine.ping()
+            return True
+        except Exception:
+            return False
+
+    def reiniciar(self):
+        """Cierra el proceso (si sigue vivo) y arranca uno nuevo con las mismas opciones."""
+        self.cerrar()
+        self.iniciar()
     
-    def mejor_jugada(self, fen: str) -> Optional[str]:
+    def limite(self, tiempo_ms: Optional[int] = None, profundidad: Optional[int] = None,
+               nodos: Optional[int] = None, mate: Optional[int] = None):
+        """`chess.engine.Limit` con los límites dados; sin ninguno, usa `tiempo_ms` del motor.
+
+        Los límites por nodos o profundidad dan niveles reproducibles e
+        independientes del hardware, y acotan el coste de CPU por jugada.
+        """
+        if tiempo_ms is None and profundidad is None and nodos is None and mate is None:
+            tiempo_ms = self.tiempo_ms
+        return chess.engine.Limit(
+            time=tiempo_ms / 1000.0 if tiempo_ms is not None else None,
+            depth=profundidad,
+            nodes=nodos,
+            mate=mate,
+        )
+
+    def _con_reintento(self, accion):
+        # Ejecuta `accion`; si el motor se cayó, lo reinicia y reintenta una vez
+        for intento in range(2):
+            try:
+                return accion()
+            except chess.engine.EngineTerminatedError:
+                if intento == 0:
+                    print("El motor UCI terminó inesperadamente; reiniciando.")
+                    self.reiniciar()
+                    if not self.engine:
+                        return None
+            except Exception:
+                return None
+        return None
+
+    def mejor_jugada(self, fen: str, tiempo_ms: Optional[int] = None, profundidad: Optional[int] = None,
+                     nodos: Optional[int] = None, mate: Optional[int] = None) -> Optional[str]:
+        """Mejor jugada en LAN (e2e4) para `fen`; si el motor se cayó, lo reinicia y reintenta una vez.
+
+        Si el motor estaba ponderando justo esta posición (acierto), aprovecha
+        ese análisis y solo espera lo que falte del tiempo; si no, lo cancela.
+        """
         if not self.engine or chess is None:
             return None
-        try:
+        limite = self.limite(tiempo_ms, profundidad, nodos, mate)
+        jugada = self._resolver_ponder(fen, limite)
+        if jugada:
+            return jugada
+
+        def jugar():
             board = chess.Board(fen)
-            info = self.engine.play(board, chess.engine.Limit(time=self.tiempo_ms/1000.0))
+            info = self.engine.play(board, limite, info=_INFO_LINEA)
+            self.ultima_linea = _linea_analisis(info.info)
+            self.ultima_profundidad = self.ultima_linea.profundidad
+            self.ultima_ponder = info.ponder.uci() if info.ponder else None
             move = info.move
             # Devolver en formato LAN (e2e4)
-            uci = move.uci()
-            return uci
+            return move.uci() if move else None
+        return self._con_reintento(jugar)
+
+    def analizar(self, fen: str, tiempo_ms: Optional[int] = None, profundidad: Optional[int] = None,
+                 nodos: Optional[int] = None, mate: Optional[int] = None,
+                 multipv: int = 1) -> List[LineaAnalisis]:
+        """Analiza `fen` y devuelve las `multipv` mejores líneas, ordenadas (vacío si falla)."""
+        if not self.engine or chess is None:
+            return []
+        self.detener_ponder()
+        limite = self.limite(tiempo_ms, profundidad, nodos, mate)
+
+        def analizar():
+            infos = self.engine.analyse(chess.Board(fen), limite, multipv=multipv, info=chess.engine.INFO_ALL)
+            return [_linea_analisis(info) for info in infos]
+        lineas = self._con_reintento(analizar) or []
+        if lineas:
+            self.ultima_linea = lineas[0]
+            self.ultima_profundidad = lineas[0].profundidad
+        return lineas
+
+    def analizar_en_vivo(self, fen: str, tiempo_ms: Optional[int] = None, profundidad: Optional[int] = None,
+                         nodos: Optional[int] = None, mate: Optional[int] = None,
+                         multipv: int = 1) -> Iterator[LineaAnalisis]:
+        """Genera cada línea `info` con PV según la emite el motor.
+
+        Quien consume puede salir del bucle en cuanto una línea se estabiliza:
+        al cerrar el generador se envía `stop` al motor.
+        """
+        if not self.engine or chess is None:
+            return
+        self.detener_ponder()
+        analisis = self.engine.analysis(chess.Board(fen), self.limite(tiempo_ms, profundidad, nodos, mate),
+                                        multipv=multipv, info=chess.engine.INFO_ALL)
+        try:
+            for info in analisis:
+                if info.get("pv"):
+                    yield _linea_analisis(info)
+        finally:
+            analisis.stop()
+            analisis.wait()
+
+    def ponderar(self, fen: str, jugada: str, respuesta: str, tiempo_max_ms: Optional[int] = None) -> bool:
+        """Empieza a analizar la posición tras `jugada` y la `respuesta` esperada del rival.
+
+        `tiempo_max_ms` acota el ponder (None: hasta la siguiente petición).
+        """
+        if not self.engine or chess is None:
+            return False
+        self.detener_ponder()
+        try:
+            board = chess.Board(fen)
+            board.push_uci(jugada)
+            board.push_uci(respuesta)
+            limite = chess.engine.Limit(time=tiempo_max_ms / 1000.0) if tiempo_max_ms else None
+            analisis = self.engine.analysis(board, limite, info=_INFO_LINEA)
+        except Exception:
+            return False
+        self._ponder = (CacheAnalisis.normalizar_fen(board.fen()), analisis, time.monotonic())
+        return True
+
+    def ponderando(self) -> bool:
+        return self._ponder is not None
+
+    def detener_ponder(self):
+        """Cancela el ponder en curso (fallo de ponder o fin de partida)."""
+        if self._ponder is None:
+            return
+        _, analisis, _ = self._ponder
+        self._ponder = None
+        try:
+            analisis.stop()
+            analisis.wait()
+        except Exception:
+            pass
+
+    def _resolver_ponder(self, fen: str, limite) -> Optional[str]:
+        # Acierto: completar el tiempo que falte y tomar la jugada del análisis; fallo: cancelar.
+        # Con límites de nodos/profundidad se busca de nuevo para que el resultado sea reproducible.
+        if self._ponder is None:
+            return None
+        fen_esperado, analisis, inicio = self._ponder
+        if limite.time is None or CacheAnalisis.normalizar_fen(fen) != fen_esperado:
+            self.detener_ponder()
+            return None
+        self._ponder = None
+        try:
+            restante = limite.time - (time.monotonic() - inicio)
+            if restante > 0:
+                time.sleep(restante)
+            analisis.stop()
+            resultado = analisis.wait()
+            self.ultima_linea = _linea_analisis(analisis.info)
+            self.ultima_profundidad = self.ultima_linea.profundidad
+            self.ultima_ponder = resultado.ponder.uci() if resultado.ponder else None
+            return resultado.move.uci() if resultado.move else None
         except Exception:
             return None
     
     def cerrar(self):
+        self._ponder = None
         try:
             if self.engine:
                 self.engine.quit()
         except Exception:
             pass
+        self.engine = None
+
+
+class PoolMotores:
+    """Motores UCI de larga vida, uno por (ruta, opciones).
+
+    Arrancar Stockfish (y cargar su red NNUE) cuesta más que una búsqueda
+    corta, así que los procesos se reutilizan entre jugadas:
+    - `prestar` entrega el motor en exclusiva (una búsqueda a la vez por proceso)
+    - antes de entregarlo se comprueba que responde; si no, se reinicia
+    - los motores sin uso durante `inactividad_s` segundos se cierran
+    """
+    def __init__(self, inactividad_s: float = 300.0):
+        self.inactividad_s = inactividad_s
+        self._motores: Dict[Tuple[str, Tuple], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._vigilante: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _clave(ruta_motor: str, opciones: Optional[Dict[str, Any]]) -> Tuple[str, Tuple]:
+        return os.path.abspath(ruta_motor), tuple(sorted((opciones or {}).items()))
+
+    @contextmanager
+    def prestar(self, ruta_motor: str, opciones: Optional[Dict[str, Any]] = None):
+        """Context manager que entrega un `MotorUCI` disponible, o None si no arranca."""
+        clave = self._clave(ruta_motor, opciones)
+        with self._lock:
+            entrada = self._motores.get(clave)
+            if entrada is None:
+                entrada = {"motor": None, "lock": threading.Lock(), "ultimo_uso": time.monotonic()}
+                self._motores[clave] = entrada
+            self._iniciar_vigilante()
+        with entrada["lock"]:
+            motor = entrada["motor"]
+            if motor is None:
+                motor = MotorUCI(ruta_motor, opciones=opciones)
+                entrada["motor"] = motor
+            elif not motor.ponderando() and not motor.vivo():
+                # (un `isready` cortaría el ponder; mientras pondera el proceso sigue vivo)
+                print("El motor UCI no responde; reiniciando.")
+                motor.reiniciar()
+            try:
+                yield motor if motor.disponible() else None
+            finally:
+                entrada["ultimo_uso"] = time.monotonic()
+
+    def cerrar_inactivos(self):
+        """Cierra los motores libres que llevan más de `inactividad_s` sin usarse."""
+        limite = time.monotonic() - self.inactividad_s
+        with self._lock:
+            for clave, entrada in list(self._motores.items()):
+                if entrada["ultimo_uso"] < limite and entrada["lock"].acquire(blocking=False):
+                    try:
+                        if entrada["motor"]:
+                            entrada["motor"].cerrar()
+                        del self._motores[clave]
+                    finally:
+                        entrada["lock"].release()
+
+    def detener_ponder(self, ruta_motor: Optional[str] = None):
+        """Cancela el ponder de los motores libres (p. ej. al salir de una partida).
+
+        Con `ruta_motor`, solo el de los procesos de ese binario.
+        """
+        ruta = os.path.abspath(ruta_motor) if ruta_motor else None
+        with self._lock:
+            entradas = [entrada for (ruta_clave, _), entrada in self._motores.items()
+                        if ruta is None or ruta_clave == ruta]
+        for entrada in entradas:
+            if entrada["motor"] and entrada["lock"].acquire(blocking=False):
+                try:
+                    entrada["motor"].detener_ponder()
+                finally:
+                    entrada["lock"].release()
+
+    def cerrar_todos(self):
+        """Cierra todos los procesos del pool (se llama también al salir del programa)."""
+        with self._lock:
+            entradas = list(self._motores.values())
+            self._motores.clear()
+        for entrada in entradas:
+            with entrada["lock"]:
+                if entrada["motor"]:
+                    entrada["motor"].cerrar()
+
+    def _iniciar_vigilante(self):
+        # Hilo daemon que revisa periódicamente los motores inactivos. También los
+        # cierra al terminar el hilo principal: python-chess mantiene un hilo no
+        # daemon por motor, y el intérprete lo espera antes de ejecutar `atexit`.
+        if self._vigilante is not None and self._vigilante.is_alive():
+            return
+        def vigilar():
+            principal = threading.main_thread()
+            while True:
+                principal.join(max(1.0, self.inactividad_s / 4))
+                if not principal.is_alive():
+                    self.cerrar_todos()
+                    return
+                self.cerrar_inactivos()
+        self._vigilante = threading.Thread(target=vigilar, name="PoolMotores", daemon=True)
+        self._vigilante.start()
+
+
+# Pool compartido por `sugerir_movimiento` y los modos de juego
+POOL_MOTORES = PoolMotores()
+atexit.register(POOL_MOTORES.cerrar_todos)
+
+
 class Reglas:
-    def __init__(self):
-        self.board = chess.Board() if chess is not None else None
-    def actualizar(self, casillas: Dict[Tuple[int, int], Optional[Pieza]], turno: Color):
+    """Validación con python-chess sobre un `chess.Board` que avanza a la par del juego.
+
+    El tablero se actualiza con `registrar_movimiento` (un `push` por jugada) y
+    `deshacer`; solo se reconstruye desde `casillas` al llamar a `actualizar`
+    (resincronización explícita). Así las consultas no generan ni parsean FEN y
+    quedan disponibles el historial, la repetición y la regla de los 50 movimientos.
+    """
+    PROMOCIONES = {
+        TipoPieza.REINA: "q",
+        TipoPieza.TORRE: "r",
+        TipoPieza.ALFIL: "b",
+        TipoPieza.CABALLO: "n",
+    }
+
+    def __init__(self, fen: Optional[str] = None):
+        if chess is None:
+            self.board = None
+        else:
+            self.board = chess.Board(fen) if fen else chess.Board()
+
+    def actualizar(self, casillas: Dict[Tuple[int, int], Optional[Pieza]], turno: Color,
+                   fen: Optional[str] = None):
+        """Resincroniza desde el modelo propio (pierde el historial); `fen` tiene prioridad si se pasa."""
         if self.board is None:
             return
-        fen = tablero_a_fen(casillas, turno)
-        self.board.set_fen(fen)
-    def es_legal(self, casillas: Dict[Tuple[int, int], Optional[Pieza]], turno: Color, origen: Tuple[int, int], destino: Tuple[int, int]) -> bool:
+        self.board.set_fen(fen or tablero_a_fen(casillas, turno))
+
+    def _movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int],
+                    promocion: Optional[TipoPieza] = None):
+        # Coordenadas internas: y=0 es la fila 1, igual que chess.square(x, y)
+        o = chess.square(origen[0], origen[1])
+        d = chess.square(destino[0], destino[1])
+        if promocion is None:
+            pieza = self.board.piece_at(o)
+            if pieza and pieza.piece_type == chess.PAWN and chess.square_rank(d) in (0, 7):
+                return chess.Move(o, d, chess.QUEEN)
+            return chess.Move(o, d)
+        return chess.Move.from_uci(chess.square_name(o) + chess.square_name(d) + self.PROMOCIONES[promocion])
+
+    def registrar_movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int],
+                             promocion: Optional[TipoPieza] = None) -> bool:
+        """Aplica en el tablero de python-chess la jugada ya hecha en el juego; False si no es legal."""
         if self.board is None:
             return False
-        self.actualizar(casillas, turno)
-        o = chess.square(origen[0], 7 - origen[1])
-        d = chess.square(destino[0], 7 - destino[1])
-        return chess.Move(o, d) in self.board.legal_moves
+        move = self._movimiento(origen, destino, promocion)
+        if move not in self.board.legal_moves:
+            return False
+        self.board.push(move)
+        return True
+
+    def deshacer(self) -> bool:
+        """Revierte la última jugada registrada."""
+        if self.board is None or not self.board.move_stack:
+            return False
+        self.board.pop()
+        return True
+
+    def es_legal(self, casillas: Dict[Tuple[int, int], Optional[Pieza]], turno: Color, origen: Tuple[int, int], destino: Tuple[int, int],
+                 promocion: Optional[TipoPieza] = None) -> bool:
+        """Legalidad de origen→destino en la posición sincronizada.
+
+        `casillas` y `turno` se aceptan por compatibilidad y se ignoran: la posición
+        es la que llevan `registrar_movimiento`/`deshacer` (o `actualizar`).
+        """
+        if self.board is None:
+            return False
+        return self._movimiento(origen, destino, promocion) in self.board.legal_moves
+
+    def _con_turno(self, turno_consulta: Color):
+        # Consulta desde el punto de vista de `turno_consulta` sin tocar el tablero sincronizado
+        turno = turno_consulta == Color.BLANCO
+        if self.board.turn == turno:
+            return self.board
+        board = self.board.copy(stack=False)
+        board.turn = turno
+        return board
+
     def esta_en_jaque(self, casillas: Dict[Tuple[int, int], Optional[Pieza]], turno_consulta: Color) -> bool:
+        """Jaque de `turno_consulta` en la posición sincronizada (`casillas` se ignora)."""
         if self.board is None:
             return False
-        original = self.board.turn
-        self.actualizar(casillas, turno_consulta)
-        self.board.turn = (turno_consulta == Color.BLANCO)
-        res = self.board.is_check()
-        self.board.turn = original
-        return res
+        return self._con_turno(turno_consulta).is_check()
+
     def esta_en_jaque_mate(self, casillas: Dict[Tuple[int, int], Optional[Pieza]], turno_consulta: Color) -> bool:
+        """Jaque mate de `turno_consulta` en la posición sincronizada (`casillas` se ignora)."""
         if self.board is None:
             return False
-        original = self.board.turn
-        self.actualizar(casillas, turno_consulta)
-        self.board.turn = (turno_consulta == Color.BLANCO)
-        res = self.board.is_checkmate()
-        self.board.turn = original
-        return res
-def _ruta_motor_por_defecto(nombre_motor: str) -> Optional[str]:
-    """Resuelve una ruta probable del motor UCI según el SO.
-
-    - Busca en el directorio del proyecto (./bin o junto al proyecto).
-    - Busca en PATH usando `shutil.which`.
-    - Busca variantes del binario en la carpeta ./stockfish/.
+        return self._con_turno(turno_consulta).is_checkmate()
+
+    def es_repeticion(self, veces: int = 3) -> bool:
+        """True si la posición actual se ha repetido `veces` veces desde la última resincronización."""
+        return self.board is not None and self.board.is_repetition(veces)
+
+    def regla_cincuenta_movimientos(self) -> bool:
+        """True si se puede reclamar tablas por 50 movimientos sin captura ni avance de peón."""
+        return self.board is not None and self.board.is_fifty_moves()
+
+    def historial_lan(self):
+        """Jugadas registradas en LAN (e2e4, e7e8q), en orden."""
+        if self.board is None:
+            return []
+        return [move.uci() for move in self.board.move_stack]
+
+
+class CacheAnalisis:
+    """Caché persistente de jugadas del motor en un fichero SQLite.
+
+    - Clave: FEN normalizado (sin contadores), motor (ruta absoluta real y mtime
+      del binario: otra versión o el mismo nombre en otra carpeta no comparten
+      entradas) y opciones
+    - Cada entrada guarda la línea principal (jugada, puntuación, PV, nodos) con
+      la profundidad y el tiempo de la búsqueda; se reutiliza solo si cubre lo
+      pedido (profundidad guardada >= pedida, ídem tiempo)
+    - Tamaño acotado: al superar `max_entradas` se descartan las menos usadas (LRU)
+    - Contadores de aciertos/fallos en `estadisticas()`
     """
-    import shutil
+    _COLUMNAS_LINEA = (("puntuacion_cp", "INTEGER"), ("mate", "INTEGER"), ("pv", "TEXT"), ("nodos", "INTEGER"))
 
-    nombre_motor = nombre_motor.lower().strip()
-    if nombre_motor in ("stockfish", "sf"):
-        base = "stockfish"
-    elif nombre_motor in ("lc0", "leela", "leelachesszero"):
-        base = "lc0"
-    else:
-        return None
+    def __init__(self, ruta: str, max_entradas: int = 100000):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        # Las búsquedas en segundo plano usan la caché desde otros hilos
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS analisis (
+                fen TEXT NOT NULL,
+                motor TEXT NOT NULL,
+                opciones TEXT NOT NULL,
+                jugada TEXT NOT NULL,
+                profundidad INTEGER,
+                tiempo_ms INTEGER,
+                uso REAL NOT NULL,
+                puntuacion_cp INTEGER,
+                mate INTEGER,
+                pv TEXT,
+                nodos INTEGER,
+                PRIMARY KEY (fen, motor, opciones)
+            );
+            CREATE INDEX IF NOT EXISTS analisis_uso ON analisis (uso);
+        """)
+        # Ficheros de versiones anteriores (solo jugada): se añaden las columnas de la línea
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(analisis)")}
+        for columna, tipo in self._COLUMNAS_LINEA:
+            if columna not in columnas:
+                self._conexion.execute(f"ALTER TABLE analisis ADD COLUMN {columna} {tipo}")
+        self._conexion.commit()
+        # Cuenta de entradas llevada a mano: no se recuenta la tabla en cada inserción
+        self._entradas = self._conexion.execute("SELECT COUNT(*) FROM analisis").fetchone()[0]
+
+    @staticmethod
+    def normalizar_fen(fen: str) -> str:
+        """Colocación, turno, enroques y al paso: los contadores no cambian la jugada."""
+        return " ".join(fen.split()[:4])
+
+    @staticmethod
+    def identificar_motor(motor: str) -> str:
+        """Identidad del binario para la clave: ruta absoluta real y su mtime."""
+        ruta = os.path.realpath(motor)
+        return f"{ruta}@{_mtime(ruta)}"
+
+    @staticmethod
+    def _clave(fen: str, motor: str, opciones: Optional[Dict[str, Any]]) -> Tuple[str, str, str]:
+        return (CacheAnalisis.normalizar_fen(fen), CacheAnalisis.identificar_motor(motor),
+                repr(sorted((opciones or {}).items())))
+
+    def obtener(self, fen: str, motor: str, opciones: Optional[Dict[str, Any]] = None,
+                profundidad: Optional[int] = None, tiempo_ms: Optional[int] = None) -> Optional[str]:
+        """Jugada guardada si cubre la profundidad/tiempo pedidos; None (y un fallo) si no."""
+        linea = self.obtener_linea(fen, motor, opciones, profundidad, tiempo_ms)
+        return linea.jugada if linea else None
+
+    def obtener_linea(self, fen: str, motor: str, opciones: Optional[Dict[str, Any]] = None,
+                      profundidad: Optional[int] = None, tiempo_ms: Optional[int] = None) -> Optional[LineaAnalisis]:
+        """Línea guardada (jugada, puntuación, PV y profundidad) si cubre lo pedido; None (y un fallo) si no.
+
+        Con `profundidad`, solo vale una entrada de al menos esa profundidad; sin
+        ella, una de al menos `tiempo_ms`.
+        """
+        clave = self._clave(fen, motor, opciones)
+        with self._lock:
+            fila = self._conexion.execute(
+                """SELECT jugada, profundidad, tiempo_ms, puntuacion_cp, mate, pv, nodos
+                   FROM analisis WHERE fen=? AND motor=? AND opciones=?""",
+                clave
+            ).fetchone()
+            if fila is not None:
+                prof_guardada, tiempo_guardado = fila[1], fila[2]
+                if profundidad is not None and (prof_guardada or 0) < profundidad:
+                    fila = None
+                elif profundidad is None and tiempo_ms is not None and (tiempo_guardado or 0) < tiempo_ms:
+                    fila = None
+            if fila is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self._conexion.execute(
+                "UPDATE analisis SET uso=? WHERE fen=? AND motor=? AND opciones=?", (time.time(),) + clave
+            )
+            self._conexion.commit()
+        jugada, prof_guardada, _, puntuacion_cp, mate, pv, nodos = fila
+        return LineaAnalisis(multipv=1, jugada=jugada, puntuacion_cp=puntuacion_cp, mate=mate,
+                             pv=pv.split() if pv else [jugada], profundidad=prof_guardada,
+                             seldepth=None, nodos=nodos, nps=None)
+
+    def guardar(self, fen: str, motor: str, jugada: str, opciones: Optional[Dict[str, Any]] = None,
+                profundidad: Optional[int] = None, tiempo_ms: Optional[int] = None,
+                linea: Optional[LineaAnalisis] = None):
+        """Guarda una jugada (y, si se pasa, la puntuación, PV y nodos de `linea`).
+
+        No sustituye una entrada de mayor profundidad.
+        """
+        clave = self._clave(fen, motor, opciones)
+        if linea is not None and linea.jugada == jugada:
+            extra = (linea.puntuacion_cp, linea.mate, " ".join(linea.pv) or None, linea.nodos)
+        else:
+            extra = (None, None, None, None)
+        with self._lock:
+            nueva = self._conexion.execute(
+                "SELECT 1 FROM analisis WHERE fen=? AND motor=? AND opciones=?", clave
+            ).fetchone() is None
+            self._conexion.execute(
+                """INSERT INTO analisis (fen, motor, opciones, jugada, profundidad, tiempo_ms, uso,
+                                         puntuacion_cp, mate, pv, nodos)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (fen, motor, opciones) DO UPDATE SET
+                       jugada=excluded.jugada, profundidad=excluded.profundidad,
+                       tiempo_ms=excluded.tiempo_ms, uso=excluded.uso,
+                       puntuacion_cp=excluded.puntuacion_cp, mate=excluded.mate,
+                       pv=excluded.pv, nodos=excluded.nodos
+                   WHERE IFNULL(excluded.profundidad, 0) >= IFNULL(analisis.profundidad, 0)""",
+                clave + (jugada, profundidad, tiempo_ms, time.time()) + extra
+            )
+            if nueva:
+                self._entradas += 1
+            if self._entradas > self.max_entradas:
+                # Solo al pasar del límite se recuenta (otro proceso puede compartir el fichero)
+                self._entradas = self._conexion.execute("SELECT COUNT(*) FROM analisis").fetchone()[0]
+                if self._entradas > self.max_entradas:
+                    self._conexion.execute(
+                        "DELETE FROM analisis WHERE rowid IN (SELECT rowid FROM analisis ORDER BY uso LIMIT ?)",
+                        (self._entradas - self.max_entradas,)
+                    )
+                    self._entradas = self.max_entradas
+            self._conexion.commit()
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Aciertos, fallos y número de entradas guardadas."""
+        with self._lock:
+            entradas = self._conexion.execute("SELECT COUNT(*) FROM analisis").fetchone()[0]
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": entradas}
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+# Caché compartida por `sugerir_movimiento`; se abre con la primera consulta
+_CACHE_ANALISIS: Optional[CacheAnalisis] = None
+
+
+def cache_analisis_por_defecto() -> Optional[CacheAnalisis]:
+    """Abre (una vez) `cache_analisis.sqlite3` en el directorio del proyecto; None si no se puede."""
+    global _CACHE_ANALISIS
+    if _CACHE_ANALISIS is None:
+        ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_analisis.sqlite3")
+        try:
+            _CACHE_ANALISIS = CacheAnalisis(ruta)
+        except sqlite3.Error as e:
+            print(f"No se pudo abrir la caché de análisis {ruta}: {e}")
+            return None
+    return _CACHE_ANALISIS
+
+
+class EntradaMotor(NamedTuple):
+    """Motor del registro: `tipo` es "uci" (binario externo) o "interno".
+
+    `ruta` fija el binario; si es None se busca `binario` en PATH y en las
+    carpetas del proyecto. `alias` son otros nombres aceptados (sf, leela...).
+    """
+    nombre: str
+    tipo: str = "uci"
+    ruta: Optional[str] = None
+    binario: Optional[str] = None
+    alias: Tuple[str, ...] = ()
+
+
+# Registro por defecto; `motores.json` (o $AJEDREZ_MOTORES) añade o sustituye entradas
+# y $AJEDREZ_MOTOR_<NOMBRE> fija la ruta de un motor concreto
+REGISTRO_MOTORES: Dict[str, EntradaMotor] = {
+    "stockfish": EntradaMotor("stockfish", binario="stockfish", alias=("sf",)),
+    "lc0": EntradaMotor("lc0", binario="lc0", alias=("leela", "leelachesszero")),
+    "interno": EntradaMotor("interno", tipo="interno", alias=("python",)),
+}
+
+# Motor de las partidas "vs Máquina" si no se elige otro
+MOTOR_POR_DEFECTO = os.environ.get("AJEDREZ_MOTOR", "stockfish")
+
+_RAIZ_PROYECTO = os.path.dirname(os.path.abspath(__file__))
+_RUTA_MANIFIESTO = os.path.join(_RAIZ_PROYECTO, "motores_manifiesto.json")
+
+# Resoluciones ya hechas en este proceso (nombre -> ruta o None)
+_RUTAS_RESUELTAS: Dict[str, Optional[str]] = {}
+_CERROJO_REGISTRO = threading.Lock()
+
+
+def cargar_registro(ruta: Optional[str] = None) -> Dict[str, EntradaMotor]:
+    """Lee motores de un JSON ({nombre: {tipo, ruta, binario, alias}}) y los añade a `REGISTRO_MOTORES`.
+
+    Sin `ruta` se usa $AJEDREZ_MOTORES o `motores.json` junto al proyecto; si no
+    existe, se mantiene el registro por defecto. Después se aplican las rutas de
+    $AJEDREZ_MOTOR_<NOMBRE> (p. ej. AJEDREZ_MOTOR_STOCKFISH=/opt/sf/stockfish).
+    """
+    if ruta is None:
+        ruta = os.environ.get("AJEDREZ_MOTORES") or os.path.join(_RAIZ_PROYECTO, "motores.json")
+    if os.path.isfile(ruta):
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                datos = json.load(f)
+            for nombre, campos in datos.items():
+                nombre = nombre.lower()
+                REGISTRO_MOTORES[nombre] = EntradaMotor(
+                    nombre=nombre,
+                    tipo=campos.get("tipo", "uci"),
+                    ruta=campos.get("ruta"),
+                    binario=campos.get("binario", nombre),
+                    alias=tuple(a.lower() for a in campos.get("alias", ())),
+                )
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"No se pudo leer el registro de motores {ruta}: {e}")
+    for nombre, entrada in list(REGISTRO_MOTORES.items()):
+        ruta_env = os.environ.get(f"AJEDREZ_MOTOR_{nombre.upper()}")
+        if ruta_env:
+            REGISTRO_MOTORES[nombre] = entrada._replace(ruta=ruta_env)
+    with _CERROJO_REGISTRO:
+        _RUTAS_RESUELTAS.clear()
+    return REGISTRO_MOTORES
+
+
+def entrada_motor(nombre: str) -> Optional[EntradaMotor]:
+    """Entrada del registro por nombre o alias (sin distinguir mayúsculas); None si no existe."""
+    nombre = nombre.lower().strip()
+    if nombre in REGISTRO_MOTORES:
+        return REGISTRO_MOTORES[nombre]
+    for entrada in REGISTRO_MOTORES.values():
+        if nombre in entrada.alias:
+            return entrada
+    return None
+
+
+def _buscar_binario(base: str) -> Optional[str]:
+    """Busca el binario `base` en PATH, en las carpetas del proyecto y en ./stockfish/."""
+    import shutil
 
     exe = base + (".exe" if sys.platform.startswith("win") else "")
 
@@ -172,19 +856,18 @@ def _ruta_motor_por_defecto(nombre_motor: str) -> Optional[str]:
         return ruta
 
     # 2) Buscar en ./bin (relativo al proyecto)
-    raiz = os.path.dirname(os.path.abspath(__file__))
     candidatos = [
-        os.path.join(raiz, exe),
-        os.path.join(raiz, "bin", exe),
-        os.path.join(raiz, "engines", exe),
-        os.path.join(raiz, "stockfish", exe),
+        os.path.join(_RAIZ_PROYECTO, exe),
+        os.path.join(_RAIZ_PROYECTO, "bin", exe),
+        os.path.join(_RAIZ_PROYECTO, "engines", exe),
+        os.path.join(_RAIZ_PROYECTO, "stockfish", exe),
     ]
     for c in candidatos:
         if os.path.isfile(c):
             return c
 
     # 3) Buscar variantes del binario dentro de /stockfish
-    carpeta_stockfish = os.path.join(raiz, "stockfish")
+    carpeta_stockfish = os.path.join(_RAIZ_PROYECTO, "stockfish")
     if os.path.isdir(carpeta_stockfish):
         try:
             for nombre in os.listdir(carpeta_stockfish):
@@ -200,31 +883,272 @@ def _ruta_motor_por_defecto(nombre_motor: str) -> Optional[str]:
     return None
 
 
+def _leer_manifiesto() -> Dict[str, Any]:
+    try:
+        with open(_RUTA_MANIFIESTO, encoding="utf-8") as f:
+            datos = json.load(f)
+        return datos if isinstance(datos, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _escribir_manifiesto(datos: Dict[str, Any]):
+    # Escritura atómica: otro proceso nunca lee un manifiesto a medias
+    temporal = f"{_RUTA_MANIFIESTO}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=2)
+        os.replace(temporal, _RUTA_MANIFIESTO)
+    except OSError as e:
+        print(f"No se pudo escribir el manifiesto de motores {_RUTA_MANIFIESTO}: {e}")
+
+
+def _sondear_uci(ruta: str) -> Dict[str, Any]:
+    """Arranca el binario una vez para leer su `id` UCI y las opciones que declara (con su valor por defecto)."""
+    if chess is None:
+        return {}
+    try:
+        with chess.engine.SimpleEngine.popen_uci(ruta, timeout=10) as engine:
+            opciones = {
+                nombre: {"tipo": o.type, "defecto": o.default, "min": o.min, "max": o.max}
+                for nombre, o in engine.options.items()
+            }
+            return {"id": dict(engine.id), "opciones": opciones}
+    except Exception as e:
+        print(f"No se pudo sondear el motor {ruta}: {e}")
+        return {}
+
+
+def _mtime(ruta: str) -> Optional[float]:
+    try:
+        return os.stat(ruta).st_mtime
+    except OSError:
+        return None
+
+
+def resolver_motor(nombre: str, refrescar: bool = False) -> Optional[str]:
+    """Ruta del binario UCI del motor `nombre` del registro; None si no hay (o es el interno).
+
+    La búsqueda se hace una vez: en el proceso el resultado queda en memoria, y
+    entre ejecuciones en `motores_manifiesto.json` junto con el `id` y las
+    opciones UCI del binario. Una entrada del manifiesto vale mientras el
+    binario conserve su mtime y coincida con la ruta configurada; si no, se
+    busca y sondea de nuevo. `refrescar=True` ignora ambas cachés.
+    """
+    entrada = entrada_motor(nombre)
+    if entrada is None or entrada.tipo != "uci":
+        return None
+    with _CERROJO_REGISTRO:
+        if not refrescar and entrada.nombre in _RUTAS_RESUELTAS:
+            return _RUTAS_RESUELTAS[entrada.nombre]
+        manifiesto = _leer_manifiesto()
+        previa = manifiesto.get(entrada.nombre)
+        if (not refrescar and isinstance(previa, dict) and previa.get("ruta")
+                and (entrada.ruta is None or previa["ruta"] == entrada.ruta)
+                and previa.get("mtime") == _mtime(previa["ruta"])):
+            ruta = previa["ruta"]
+        else:
+            if entrada.ruta:
+                ruta = entrada.ruta if os.path.isfile(entrada.ruta) else None
+            else:
+                ruta = _buscar_binario(entrada.binario or entrada.nombre)
+            if ruta:
+                manifiesto[entrada.nombre] = dict(ruta=ruta, mtime=_mtime(ruta), **_sondear_uci(ruta))
+                _escribir_manifiesto(manifiesto)
+        _RUTAS_RESUELTAS[entrada.nombre] = ruta
+        return ruta
+
+
+def info_motor(nombre: str) -> Optional[Dict[str, Any]]:
+    """`id` y opciones UCI del motor según el manifiesto (resolviéndolo si hace falta); None si no hay binario."""
+    entrada = entrada_motor(nombre)
+    if entrada is None or not resolver_motor(nombre):
+        return None
+    return _leer_manifiesto().get(entrada.nombre)
+
+
+class PerfilMotor(NamedTuple):
+    """Configuración de motor y presupuesto de búsqueda para un nivel de dificultad.
+
+    `opciones` son opciones UCI (Threads, Hash, Skill Level, UCI_LimitStrength,
+    UCI_Elo...). MultiPV lo gestiona python-chess por búsqueda, por eso va aparte:
+    `multipv` es el número de líneas del análisis (`MotorUCI.analizar`, `python -m
+    analizar --perfil`); para jugar (`sugerir_movimiento`) solo cuenta la mejor.
+    `ponder_ms`: 0 sin ponder, None hasta la jugada del rival.
+    """
+    nombre: str
+    opciones: Dict[str, Any]
+    tiempo_ms: Optional[int] = None
+    nodos: Optional[int] = None
+    profundidad: Optional[int] = None
+    multipv: int = 1
+    ponder_ms: Optional[int] = 0
+
+
+# Perfiles por defecto: poca CPU en fácil, todos los núcleos en difícil
+PERFILES_MOTOR: Dict[str, PerfilMotor] = {
+    "facil": PerfilMotor("facil", {"Threads": 1, "Hash": 16, "Skill Level": 3}, tiempo_ms=200),
+    "medio": PerfilMotor("medio", {"Threads": 2, "Hash": 64, "Skill Level": 12}, tiempo_ms=500,
+                         ponder_ms=10000),
+    "dificil": PerfilMotor("dificil", {"Threads": os.cpu_count() or 1, "Hash": 256}, tiempo_ms=2000,
+                           ponder_ms=30000),
+}
+
+
+def cargar_perfiles(ruta: Optional[str] = None) -> Dict[str, PerfilMotor]:
+    """Lee perfiles de un JSON ({nombre: {opciones, tiempo_ms, nodos, ...}}) y los añade a `PERFILES_MOTOR`.
+
+    Sin `ruta` se busca `perfiles_motor.json` junto al proyecto; si no existe,
+    se mantienen los perfiles por defecto. Un perfil del fichero con el mismo
+    nombre que uno por defecto lo sustituye.
+    """
+    if ruta is None:
+        ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfiles_motor.json")
+        if not os.path.isfile(ruta):
+            return PERFILES_MOTOR
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        for nombre, campos in datos.items():
+            PERFILES_MOTOR[nombre] = PerfilMotor(
+                nombre=nombre,
+                opciones=dict(campos.get("opciones", {})),
+                tiempo_ms=campos.get("tiempo_ms"),
+                nodos=campos.get("nodos"),
+                profundidad=campos.get("profundidad"),
+                multipv=campos.get("multipv", 1),
+                ponder_ms=campos.get("ponder_ms", 0),
+            )
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"No se pudieron cargar los perfiles de motor de {ruta}: {e}")
+    return PERFILES_MOTOR
+
+
+cargar_perfiles()
+cargar_registro()
+
+
+# Motor interno compartido: su tabla de transposición se conserva entre jugadas
+_MOTOR_INTERNO: Optional[MotorInterno] = None
+_CERROJO_MOTOR_INTERNO = threading.Lock()
+# Motores sin binario de los que ya se avisó (el aviso sale una vez, no en cada jugada)
+_MOTORES_SIN_BINARIO_AVISADOS = set()
+
+
+def _jugada_motor_interno(fen: str, perfil: PerfilMotor) -> Optional[str]:
+    """Mejor jugada del motor interno con el presupuesto de tiempo/profundidad del perfil."""
+    global _MOTOR_INTERNO
+    with _CERROJO_MOTOR_INTERNO:
+        if _MOTOR_INTERNO is None:
+            _MOTOR_INTERNO = MotorInterno()
+        return _MOTOR_INTERNO.mejor_jugada(fen, tiempo_ms=perfil.tiempo_ms or 1000,
+                                           profundidad=perfil.profundidad)
+
+
 def sugerir_movimiento(
     casillas: Dict[Tuple[int, int], Optional[Pieza]],
     turno: Color,
-    motor: str = "stockfish",
+    motor: str = MOTOR_POR_DEFECTO,
     nivel: str = "medio",
-    ruta_motor: Optional[str] = None
+    ruta_motor: Optional[str] = None,
+    fen: Optional[str] = None,
+    pool: Optional[PoolMotores] = None,
+    cache: Optional[CacheAnalisis] = None,
+    usar_cache: bool = True,
+    ponder: bool = True,
+    cancelado: Optional[threading.Event] = None
 ) -> Optional[str]:
     """Devuelve la mejor jugada LAN usando un motor UCI local.
 
-    - Si no se pasa `ruta_motor`, intenta resolver el binario automáticamente.
+    - `motor` es un nombre o alias de `REGISTRO_MOTORES`. Si no se pasa
+      `ruta_motor`, se resuelve con `resolver_motor` (una búsqueda por proceso,
+      manifiesto en disco); sin binario, o con `motor="interno"`, juega el motor
+      interno en Python.
+    - El motor se toma prestado de `pool` (por defecto `POOL_MOTORES`), así que
+      el proceso se reutiliza entre jugadas en lugar de arrancarse cada vez.
+    - Si se pasa `fen` (p. ej. `Tablero.a_fen()`), se usa en lugar de reconstruirlo desde `casillas`.
+    - `nivel` es el nombre de un perfil de `PERFILES_MOTOR` (opciones del motor y
+      presupuesto); el proceso del pool cambia de perfil sin reiniciarse.
+    - Las posiciones ya analizadas con el mismo perfil y al menos el mismo
+      presupuesto se responden desde `cache` (por defecto
+      `cache_analisis_por_defecto()`); `usar_cache=False` la omite.
+    - Con `ponder`, tras responder el motor sigue analizando la réplica esperada
+      durante el tiempo que permita el perfil (`ponder_ms`). Si `cancelado` está
+      activado al terminar la búsqueda (p. ej. se cerró la partida), no se pondera.
+      Una respuesta desde la caché detiene el ponder que siguiera en marcha.
     """
-    niveles = {"facil": 200, "medio": 500, "dificil": 2000}
-    tiempo_ms = niveles.get(nivel, 500)
+    perfil = PERFILES_MOTOR.get(nivel) or PERFILES_MOTOR["medio"]
+    ponder_ms = perfil.ponder_ms if ponder else 0
 
-    if ruta_motor is None:
-        ruta_motor = _ruta_motor_por_defecto(motor)
+    if fen is None:
+        fen = tablero_a_fen(casillas, turno)
+    entrada = entrada_motor(motor)
+    if ruta_motor is None and entrada is not None:
+        ruta_motor = resolver_motor(motor)
     if not ruta_motor:
-        print("No se encontró el binario del motor UCI.")
-        return None
+        if (entrada is None or entrada.tipo != "interno") and motor not in _MOTORES_SIN_BINARIO_AVISADOS:
+            _MOTORES_SIN_BINARIO_AVISADOS.add(motor)
+            print(f"No se encontró el binario del motor UCI '{motor}'; se usa el motor interno.")
+        return _jugada_motor_interno(fen, perfil)
 
-    fen = tablero_a_fen(casillas, turno)
-    m = MotorUCI(ruta_motor, tiempo_ms=tiempo_ms)
-    if not m.disponible():
-        print("El motor UCI no está disponible. Verifica la ruta y permisos del binario.")
-        return None
-    jugada = m.mejor_jugada(fen)
-    m.cerrar()
+    # El presupuesto de nodos forma parte de la clave: otro límite de nodos es otra búsqueda
+    opciones_cache = dict(perfil.opciones, nodos=perfil.nodos) if perfil.nodos else perfil.opciones
+    if usar_cache and cache is None:
+        cache = cache_analisis_por_defecto()
+    if usar_cache and cache is not None:
+        jugada = cache.obtener(fen, ruta_motor, opciones_cache, profundidad=perfil.profundidad,
+                               tiempo_ms=perfil.tiempo_ms)
+        if jugada:
+            # El ponder de la jugada anterior analiza una posición que ya no se juega así
+            (pool or POOL_MOTORES).detener_ponder(ruta_motor)
+            return jugada
+    with (pool or POOL_MOTORES).prestar(ruta_motor) as m:
+        if m is None:
+            print("El motor UCI no está disponible. Verifica la ruta y permisos del binario.")
+            return None
+        m.configurar(perfil.opciones)
+        jugada = m.mejor_jugada(fen, tiempo_ms=perfil.tiempo_ms, profundidad=perfil.profundidad,
+                                nodos=perfil.nodos)
+        profundidad = m.ultima_profundidad
+        linea = m.ultima_linea
+        if jugada and m.ultima_ponder and ponder_ms != 0 and not (cancelado and cancelado.is_set()):
+            m.ponderar(fen, jugada, m.ultima_ponder, ponder_ms)
+    if jugada and usar_cache and cache is not None:
+        cache.guardar(fen, ruta_motor, jugada, opciones_cache, profundidad=profundidad,
+                      tiempo_ms=perfil.tiempo_ms, linea=linea)
     return jugada
+
+
+# Hilos para búsquedas en segundo plano; se crean con la primera petición
+_EJECUTOR_BUSQUEDAS: Optional[ThreadPoolExecutor] = None
+
+
+def sugerir_movimiento_async(
+    casillas: Dict[Tuple[int, int], Optional[Pieza]],
+    turno: Color,
+    motor: str = MOTOR_POR_DEFECTO,
+    nivel: str = "medio",
+    ruta_motor: Optional[str] = None,
+    fen: Optional[str] = None,
+    pool: Optional[PoolMotores] = None,
+    cache: Optional[CacheAnalisis] = None,
+    usar_cache: bool = True,
+    ponder: bool = True,
+    cancelado: Optional[threading.Event] = None
+) -> "Future[Optional[str]]":
+    """Como `sugerir_movimiento`, pero en un hilo de trabajo; devuelve un `Future`.
+
+    El FEN se calcula aquí, en el hilo que llama, para que el tablero pueda
+    seguir cambiando mientras el motor piensa. El bucle del juego consulta
+    `futuro.done()` en cada frame y recoge la jugada con `futuro.result()`.
+    `futuro.cancel()` no detiene una búsqueda ya empezada: para abandonarla,
+    activar `cancelado` y esperar el futuro antes de `POOL_MOTORES.detener_ponder()`.
+    """
+    global _EJECUTOR_BUSQUEDAS
+    if fen is None:
+        fen = tablero_a_fen(casillas, turno)
+    if _EJECUTOR_BUSQUEDAS is None:
+        _EJECUTOR_BUSQUEDAS = ThreadPoolExecutor(max_workers=2, thread_name_prefix="BusquedaUCI")
+    return _EJECUTOR_BUSQUEDAS.submit(
+        sugerir_movimiento, None, turno, motor, nivel, ruta_motor, fen, pool, cache, usar_cache, ponder, cancelado
+    )
@@ -0,0 +1,51 @@
+"""Reproducibilidad de la IA del Boss con semilla (un proceso frente a varios)."""
+import contextlib
+import io
+import os
+import random
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from ajedrez_sombras.constantes import TEAM_PLAYER
+from ajedrez_sombras.ia_sombras import IASombras
+from ajedrez_sombras.tablero_sombras import TableroSombras
+
+TURNOS = 6
+PROFUNDIDAD = 3
+
+
+def _partida(procesos):
+    """Juega varios turnos (jugador al azar con semilla fija) y devuelve las jugadas del Boss."""
+    pygame.font.init()  # las piezas preparan su texto al crearse
+    azar = random.Random(3)
+    tablero = TableroSombras()
+    ia = IASombras(tablero, tiempo_ms=60000, procesos=procesos, semilla=7, profundidad_semilla=PROFUNDIDAD)
+    jugadas = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(TURNOS):
+            movimientos = [(p, m) for p in list(tablero.piezas) if p.team == TEAM_PLAYER
+                           for m in p.obtener_movimientos_validos(tablero)]
+            if not movimientos or tablero.boss_muerto() or tablero.jugador_muerto():
+                break
+            pieza, (x, y) = azar.choice(movimientos)
+            tablero.mover_pieza(pieza, x, y)
+            if tablero.boss_muerto() or tablero.jugador_muerto():
+                break
+            ia.invocar_sombra()
+            jugada = ia.calcular_movimiento()
+            if jugada is None:
+                break
+            pieza, x, y = jugada
+            jugadas.append((pieza.grid_x, pieza.grid_y, x, y, ia.ultima_profundidad))
+            tablero.mover_pieza(pieza, x, y)
+    return jugadas
+
+
+def test_semilla_misma_partida_con_uno_y_dos_procesos():
+    uno = _partida(1)
+    assert len(uno) > 1
+    assert all(jugada[-1] == PROFUNDIDAD for jugada in uno)
+    assert _partida(2) == uno
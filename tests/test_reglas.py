@@ -0,0 +1,45 @@
+"""Pruebas de `Reglas` a la par del juego a través de la interfaz (sin ventana)."""
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+pytest.importorskip("chess")
+pytest.importorskip("pygame")
+
+from modelos import EstadoJuego
+from ui import InterfazUsuario
+
+# Caballos de ida y vuelta: Cf3 Cf6 Cg1 Cg8 (coordenadas internas, y=0 es la fila 1)
+IDA_Y_VUELTA = [((6, 0), (5, 2)), ((6, 7), (5, 5)), ((5, 2), (6, 0)), ((5, 5), (6, 7))]
+
+
+def test_triple_repeticion_desde_la_interfaz():
+    interfaz = InterfazUsuario()
+    for _ in range(2):
+        for origen, destino in IDA_Y_VUELTA:
+            assert interfaz.realizar_movimiento(origen, destino)
+
+    assert interfaz.reglas.es_repeticion(3)
+    assert interfaz.tablero.estado == EstadoJuego.EMPATE
+    assert interfaz.reglas.historial_lan() == ["g1f3", "g8f6", "f3g1", "f6g8"] * 2
+    assert interfaz.reglas.board.fen() == interfaz.tablero.a_fen()
+
+
+def test_deshacer_retrocede_tambien_reglas():
+    interfaz = InterfazUsuario()
+    for origen, destino in IDA_Y_VUELTA * 2:
+        interfaz.realizar_movimiento(origen, destino)
+
+    assert interfaz.deshacer_movimiento()
+    assert not interfaz.reglas.es_repeticion(3)
+    assert len(interfaz.reglas.historial_lan()) == 7
+    assert interfaz.reglas.board.fen() == interfaz.tablero.a_fen()
+
+
+def test_movimiento_ilegal_no_se_registra():
+    interfaz = InterfazUsuario()
+    assert not interfaz.realizar_movimiento((4, 1), (4, 4))
+    assert interfaz.reglas.historial_lan() == []
@@ -3,12 +3,14 @@
 Responsabilidades:
 - Menu: navegación por teclado para seleccionar el modo de juego
 - InterfazUsuario: render del tablero, manejo de eventos y temporizadores
+- Jugar y deshacer movimientos manteniendo `Reglas` (python-chess) a la par del tablero
 """
 import os
 import pygame
 from typing import List, Optional, Tuple, Dict
-from modelos import Color, EstadoJuego, GestorRecursos
+from modelos import Color, EstadoJuego, GestorRecursos, TipoPieza
 from ajedrez_clasico import Tablero
+from reglas import Reglas
 
 class Menu:
     def __init__(self, opciones: List[str], modo: str = "default"):
@@ -97,6 +99,8 @@ class InterfazUsuario:
         pygame.display.set_caption('Ajedrez')
         self.gestor_recursos = GestorRecursos()
         self.tablero = Tablero(self.gestor_recursos)
+        # Tablero de python-chess que avanza con cada jugada (repetición, 50 movimientos, historial LAN)
+        self.reglas = Reglas(self.tablero.a_fen())
         # Sonido de ficha (puede ser None si no está disponible)
         self.sonido_ficha = self.gestor_recursos.obtener_sonido("FICHA")
         self.cuadrado_tamano = self.ancho // 8
@@ -118,6 +122,8 @@ class InterfazUsuario:
         self.timers_activos = True
         # Mensaje de estado adicional para modos especiales (LAN, espera, etc.)
         self.mensaje_estado: Optional[str] = None
+        # Permite deshacer la última jugada con Retroceso (solo partidas locales)
+        self.permitir_deshacer = False
          
     def manejar_eventos(self) -> Tuple[bool, Optional[Tuple[int, int]]]:
         """Procesa eventos de Pygame y traduce clics a coordenadas de casilla."""
@@ -125,6 +131,9 @@ class InterfazUsuario:
             for evento in pygame.event.get():
                 if evento.type == pygame.QUIT:
                     return False, None
+                elif (evento.type == pygame.KEYDOWN and evento.key == pygame.K_BACKSPACE
+                      and self.permitir_deshacer):
+                    self.deshacer_movimiento()
                 elif evento.type == pygame.MOUSEBUTTONDOWN:
                     x = evento.pos[0] // self.cuadrado_tamano
                     y = evento.pos[1] // self.cuadrado_tamano
@@ -134,6 +143,27 @@ class InterfazUsuario:
             print(f"Error en manejar_eventos: {e}")
             return True, None
         
+    def realizar_movimiento(self, origen: Tuple[int, int], destino: Tuple[int, int],
+                            promocion: Optional[TipoPieza] = None) -> bool:
+        """Juega origen→destino en el tablero y registra la jugada en `reglas`.
+
+        Sin `promocion`, ambos coronan a reina.
+        """
+        if not self.tablero.realizar_movimiento(origen, destino, promocion):
+            return False
+        if not self.reglas.registrar_movimiento(origen, destino, promocion):
+            # Desincronizado (p. ej. edición directa del tablero): resincronizar desde el FEN
+            self.reglas.actualizar(self.tablero.casillas, self.tablero.turno, self.tablero.a_fen())
+        return True
+
+    def deshacer_movimiento(self) -> bool:
+        """Deshace la última jugada en el tablero y en `reglas`."""
+        if not self.tablero.deshacer_movimiento():
+            return False
+        if not self.reglas.deshacer():
+            self.reglas.actualizar(self.tablero.casillas, self.tablero.turno, self.tablero.a_fen())
+        return True
+
     def actualizar_tiempos(self, dt: float):
         """Actualiza temporizadores por turno; marca fin si un jugador agota tiempo."""
         try:
@@ -162,13 +192,14 @@ class InterfazUsuario:
                                (i*self.cuadrado_tamano, j*self.cuadrado_tamano, 
                                 self.cuadrado_tamano, self.cuadrado_tamano))
                 casilla = self.tablero.casillas.get((i, j))
-                if casilla and casilla.imagen:
-                    rect = casilla.imagen.get_rect()
+                if casilla:
+                    imagen = self.gestor_recursos.obtener_imagen(casilla.color, casilla.tipo)
+                    rect = imagen.get_rect()
                     rect.center = (
                         i * self.cuadrado_tamano + self.cuadrado_tamano // 2,
                         j * self.cuadrado_tamano + self.cuadrado_tamano // 2
                     )
-                    self.pantalla.blit(casilla.imagen, rect)
+                    self.pantalla.blit(imagen, rect)
         self.dibujar_informacion()
     
     def dibujar_informacion(self):